@@ -0,0 +1,179 @@
+"""Write-behind ingestion of analytics events.
+
+Public endpoints enqueue events and return at once; a background flusher
+writes them in batches when either the batch size or the flush interval is
+reached. The lifespan starts the flusher and drains the queue on shutdown.
+
+Writes that fail on a lost connection are retried with backoff. A batch that
+violates a constraint (typically an event for an employee deleted before the
+flush) is bisected so only the offending rows are dropped.
+"""
+import asyncio
+from typing import List, Optional
+
+from sqlalchemy.exc import DBAPIError, IntegrityError, InterfaceError, OperationalError
+
+import services
+from config import settings
+from database import AsyncSessionLocal
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Whether `error` means the database was unreachable, so a retry may succeed."""
+    if isinstance(error, (OperationalError, InterfaceError)):
+        return True
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated
+    return isinstance(error, (OSError, asyncio.TimeoutError))
+
+
+class AnalyticsWriter:
+    """Bounded in-process queue of analytics rows with a batching flusher."""
+
+    def __init__(
+        self,
+        maxsize: int = settings.analytics_queue_size,
+        batch_size: int = settings.analytics_batch_size,
+        flush_interval: float = settings.analytics_flush_interval,
+        policy: str = settings.analytics_queue_policy,
+        retries: int = settings.analytics_write_retries,
+        retry_delay: float = settings.analytics_retry_delay,
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown analytics queue policy: {policy}")
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: List[dict] = []
+        self._flushing: Optional[asyncio.Task] = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.retried = 0
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Created lazily so it binds to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        return self._queue
+
+    async def enqueue(self, row: dict) -> bool:
+        """Queue one analytics row. Returns False if it was dropped."""
+        if self.policy == "block":
+            await self.queue.put(row)
+        else:
+            try:
+                self.queue.put_nowait(row)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                return False
+        self.enqueued += 1
+        return True
+
+    def start(self) -> None:
+        """Start the background flusher."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+
+        remaining, self._pending = self._pending, []
+        while not self.queue.empty():
+            remaining.append(self.queue.get_nowait())
+        for start in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[start:start + self.batch_size])
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._pending = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(self._pending) < self.batch_size:
+                try:
+                    self._pending.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch, self._pending = self._pending, []
+            # Shielded so shutdown never abandons a batch halfway through a write
+            self._flushing = asyncio.create_task(self._flush(batch))
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def _write(self, batch: List[dict]) -> None:
+        """Insert a batch in one transaction, retrying connection errors with backoff."""
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                async with AsyncSessionLocal() as session:
+                    await services.insert_events(session, batch)
+                    await session.commit()
+                return
+            except Exception as e:
+                if attempt == self.retries or not is_connection_error(e):
+                    raise
+                self.retried += 1
+                print(f"⏳ Analytics write failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def _flush(self, batch: List[dict]) -> None:
+        if not batch:
+            return
+        try:
+            await self._write(batch)
+        except IntegrityError as e:
+            if len(batch) == 1:
+                self.failed += 1
+                print(f"⚠️  Dropped analytics event violating a constraint: {e.orig}")
+                return
+            # Split until the offending rows are isolated; the rest are still written
+            middle = len(batch) // 2
+            await self._flush(batch[:middle])
+            await self._flush(batch[middle:])
+            return
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"❌ Failed to write {len(batch)} analytics events: {e}")
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "retried": self.retried,
+        }
+
+
+analytics_writer = AnalyticsWriter()
@@ -0,0 +1,132 @@
+"""Bulk QR / vCard asset export for a whole company, streamed as a ZIP archive.
+
+There is no job state: each export is rendered and streamed by the worker
+that receives the request, so any number of workers can serve exports.
+Progress is visible from the stream itself (X-Export-Total header, entries
+arriving in order, and a closing manifest.json).
+"""
+import asyncio
+import io
+import json
+import os
+import zipfile
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional
+
+import qr_utils
+import vcard_utils
+from config import settings
+
+EXPORT_WORKERS = settings.export_workers or os.cpu_count() or 2
+EXPORT_BATCH_SIZE = settings.export_batch_size
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared process pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=EXPORT_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the process pool (called from the app lifespan on shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def render_assets(cards: List[dict]) -> List[tuple]:
+    """Render the .vcf and QR PNG for a batch of cards.
+
+    Runs in a worker process, so it only takes and returns plain data.
+    """
+    rendered = []
+    for card in cards:
+        vcf = vcard_utils.render_vcard_file(card["payload"]).body
+        png = qr_utils.render_qr(card["vcard_url"], "png")
+        rendered.append((card["employee_slug"], vcf, png))
+    return rendered
+
+
+# ========== ZIP Streaming ==========
+
+class _ZipChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands ZIP bytes back in chunks.
+
+    zipfile falls back to data descriptors when it cannot seek, so entries can
+    be emitted as soon as they are written and nothing is held in memory.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _add_to_archive(archive: zipfile.ZipFile, rendered: List[tuple]) -> None:
+    for employee_slug, vcf, png in rendered:
+        archive.writestr(f"vcards/{employee_slug}.vcf", vcf, compress_type=zipfile.ZIP_DEFLATED)
+        # PNG data is already compressed
+        archive.writestr(f"qr/{employee_slug}.png", png, compress_type=zipfile.ZIP_STORED)
+
+
+async def stream_assets_zip(company_slug: str, total: int, batches: AsyncIterator[List[dict]]) -> AsyncIterator[bytes]:
+    """Render card batches across the process pool and stream them as a ZIP.
+
+    A few batches are kept in flight so every worker stays busy, and results
+    are written in submission order. The archive ends with manifest.json, so
+    a client can tell a complete download from a truncated one.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    max_in_flight = EXPORT_WORKERS * 2
+    in_flight: deque = deque()
+    buffer = _ZipChunkBuffer()
+    exported = 0
+
+    try:
+        with zipfile.ZipFile(buffer, mode="w") as archive:
+            async for batch in batches:
+                in_flight.append((len(batch), loop.run_in_executor(executor, render_assets, batch)))
+                if len(in_flight) < max_in_flight:
+                    continue
+                count, future = in_flight.popleft()
+                _add_to_archive(archive, await future)
+                exported += count
+                yield buffer.drain()
+
+            while in_flight:
+                count, future = in_flight.popleft()
+                _add_to_archive(archive, await future)
+                exported += count
+                yield buffer.drain()
+
+            manifest = {
+                "company_slug": company_slug,
+                "total": total,
+                "exported": exported,
+                "completed_at": datetime.utcnow().isoformat(),
+            }
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+        # Central directory is written when the archive closes
+        yield buffer.drain()
+    finally:
+        # Client went away (or rendering failed) before the archive was finished
+        for _, future in in_flight:
+            future.cancel()
@@ -0,0 +1,93 @@
+"""
+Microbenchmark: encoding a page of employees to JSON.
+
+Compares the previous response path (ORM entity -> EmployeeResponse.from_orm
+-> .dict() -> company_slug patched in -> FastAPI revalidating against
+response_model -> jsonable_encoder -> json.dumps) with the current one
+(projected row dicts encoded by a prebuilt TypeAdapter in one call).
+
+No database is needed; rows are synthetic.
+
+Usage:
+    python benchmarks/bench_employee_serialization.py [rows] [repeats]
+"""
+
+import json
+import os
+import sys
+import timeit
+import uuid
+import warnings
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import database_models as db
+import models
+import services
+
+
+def make_employees(count: int) -> List[db.Employee]:
+    company = db.Company(id=uuid.uuid4(), name="Acme", slug="acme")
+    return [
+        db.Employee(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            company=company,
+            full_name=f"Employee {i}",
+            job_title="Account Manager",
+            email=f"employee{i}@acme.example",
+            phone="+15550100",
+            whatsapp=None,
+            photo_url=f"https://cdn.acme.example/photos/{i}.jpg",
+            bio="Helping customers get the most out of Acme.",
+            social_links={"linkedin": f"https://linkedin.com/in/employee{i}"},
+            public_slug=f"employee-{i}-{uuid.uuid4().hex[:8]}",
+            last_updated=datetime(2026, 1, 1, 12, 0, 0),
+        )
+        for i in range(count)
+    ]
+
+
+response_adapter = TypeAdapter(List[models.EmployeeResponse])
+
+
+def encode_before(employees: List[db.Employee]) -> bytes:
+    result = []
+    for employee in employees:
+        emp_data = models.EmployeeResponse.from_orm(employee).dict()
+        emp_data["company_slug"] = employee.company.slug
+        result.append(emp_data)
+    # What FastAPI does with a response_model: validate, then jsonable_encoder
+    validated = response_adapter.validate_python(result)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+def encode_after(rows: List[dict]) -> bytes:
+    return models.employee_rows_adapter.dump_json(rows, warnings=False)
+
+
+def main():
+    # The old path relies on from_orm/.dict(), deprecated in Pydantic v2
+    warnings.filterwarnings("ignore", category=DeprecationWarning)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    employees = make_employees(count)
+    # Rows as services.list_employee_rows returns them
+    rows = [services.employee_row(employee) for employee in employees]
+    assert json.loads(encode_before(employees)) == json.loads(encode_after(rows))
+
+    before = timeit.timeit(lambda: encode_before(employees), number=repeats) / repeats * 1e3
+    after = timeit.timeit(lambda: encode_after(rows), number=repeats) / repeats * 1e3
+    print(f"{count} employees per page")
+    print(f"  from_orm + response_model: {before:8.2f} ms")
+    print(f"  TypeAdapter.dump_json:     {after:8.2f} ms  ({before / after:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Microbenchmark: per-call Python overhead of the hot lookup statements.
+
+Compares building a fresh select() construct on every call (the old
+services code) with the lambda statements services now uses. Each
+iteration builds the statement and generates its cache key, which is the
+work SQLAlchemy does before it can reuse a compiled query. A full compile
+is shown for reference: that is what a compiled-cache miss costs.
+
+No database is needed.
+
+Usage:
+    python benchmarks/bench_statements.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.orm import selectinload
+
+import database_models as db
+
+
+# ========== Eager Statements (previous implementation) ==========
+
+def eager_company(company_id):
+    return select(db.Company).where(db.Company.id == company_id)
+
+def eager_employee(company_slug, employee_slug):
+    return (
+        select(db.Employee)
+        .join(db.Company, db.Employee.company_id == db.Company.id)
+        .where(db.Company.slug == company_slug)
+        .where(db.Employee.public_slug == employee_slug)
+        .options(selectinload(db.Employee.company))
+    )
+
+def eager_card(employee_id):
+    return select(db.Card).options(selectinload(db.Card.employee)).where(db.Card.employee_id == employee_id)
+
+def eager_user(user_id):
+    return select(db.User).options(selectinload(db.User.company)).where(db.User.id == user_id)
+
+
+# ========== Lambda Statements (services.py) ==========
+
+def lambda_company(company_id):
+    return lambda_stmt(lambda: select(db.Company).where(db.Company.id == company_id))
+
+def lambda_employee(company_slug, employee_slug):
+    return lambda_stmt(
+        lambda: select(db.Employee)
+        .join(db.Company, db.Employee.company_id == db.Company.id)
+        .where(db.Company.slug == company_slug)
+        .where(db.Employee.public_slug == employee_slug)
+        .options(selectinload(db.Employee.company))
+    )
+
+def lambda_card(employee_id):
+    return lambda_stmt(
+        lambda: select(db.Card).options(selectinload(db.Card.employee)).where(db.Card.employee_id == employee_id)
+    )
+
+def lambda_user(user_id):
+    return lambda_stmt(
+        lambda: select(db.User).options(selectinload(db.User.company)).where(db.User.id == user_id)
+    )
+
+
+CASES = [
+    ("get_company_by_id", eager_company, lambda_company, lambda: (uuid.uuid4(),)),
+    ("get_employee_by_slug", eager_employee, lambda_employee, lambda: ("acme", uuid.uuid4().hex[:8])),
+    ("get_card_by_employee", eager_card, lambda_card, lambda: (uuid.uuid4(),)),
+    ("get_user_by_id", eager_user, lambda_user, lambda: (uuid.uuid4(),)),
+]
+
+
+def per_call_us(build, make_args, iterations: int) -> float:
+    args = [make_args() for _ in range(iterations)]
+    it = iter(args)
+    # Warm up so lambda analysis and mapper configuration are not measured
+    build(*make_args())._generate_cache_key()
+    seconds = timeit.timeit(lambda: build(*next(it))._generate_cache_key(), number=iterations)
+    return seconds / iterations * 1e6
+
+
+def compile_us(build, make_args, iterations: int) -> float:
+    dialect = asyncpg_dialect()
+    seconds = timeit.timeit(lambda: build(*make_args()).compile(dialect=dialect), number=iterations)
+    return seconds / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{'query':<24}{'select() µs':>14}{'lambda µs':>12}{'speedup':>10}{'compile µs':>13}")
+    for name, eager, cached, make_args in CASES:
+        before = per_call_us(eager, make_args, iterations)
+        after = per_call_us(cached, make_args, iterations)
+        full = compile_us(eager, make_args, max(1, iterations // 20))
+        print(f"{name:<24}{before:>14.1f}{after:>12.1f}{before / after:>9.1f}x{full:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""In-process caches for the hot public read paths."""
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from config import settings
+
+
+class TTLCache:
+    """Bounded key/value cache with TTL expiry and LRU eviction.
+
+    Entries expire `ttl` seconds after they were stored (or after their own
+    per-entry ttl, if one is given to `set`). When the cache is full
+    the least recently used entry is evicted. Hit/miss/eviction counters are
+    kept so they can be reported by the health endpoints.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for `key`, or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store `value` under `key`, evicting the LRU entry if full."""
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        """Remove `key` from the cache if present."""
+        self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches `predicate`."""
+        stale = [key for key in self._data if predicate(key)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+    def invalidate_values_where(self, predicate: Callable[[Any], bool]) -> int:
+        """Remove every entry whose value matches `predicate`."""
+        stale = [key for key, (value, _) in self._data.items() if predicate(value)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Return size and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ByteBudgetLRUCache:
+    """LRU cache of versioned byte payloads bounded by total size.
+
+    Keys are tuples whose first element identifies the resource and whose
+    remaining elements are its version. Storing a new version of a resource
+    drops the previous one, so stale entries disappear as soon as the version
+    changes instead of waiting to be evicted.
+    """
+
+    def __init__(self, max_bytes: int, sizeof: Callable[[Any], int] = len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self._data: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._latest: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: tuple) -> Optional[Any]:
+        """Return the cached value for this exact version of the resource."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: tuple, value: Any) -> None:
+        """Store `value`, replacing older versions and evicting LRU entries."""
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        previous = self._latest.get(key[0])
+        if previous is not None and previous != key:
+            self._remove(previous)
+        self._remove(key)
+
+        self._data[key] = (value, size)
+        self._latest[key[0]] = key
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        self.current_bytes -= entry[1]
+        if self._latest.get(key[0]) == key:
+            del self._latest[key[0]]
+
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        self._data.clear()
+        self._latest.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """Return entry count, memory use and hit/miss/eviction counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# ========== Public Card Cache ==========
+
+class CachedCard(NamedTuple):
+    """A finished public card together with its HTTP validators."""
+    card: Any  # models.BusinessCardResponse
+    etag: str
+    last_modified: Optional[datetime]
+
+
+# CachedCard entries keyed by (company_slug, employee_slug)
+card_cache = TTLCache(
+    maxsize=settings.card_cache_size,
+    ttl=settings.card_cache_ttl,
+)
+
+
+def invalidate_card(company_slug: str, employee_slug: str) -> None:
+    """Drop the cached public card for one employee."""
+    card_cache.pop((company_slug, employee_slug))
+
+
+def invalidate_company_cards(company_slug: str) -> None:
+    """Drop every cached public card belonging to a company."""
+    card_cache.invalidate_where(lambda key: key[0] == company_slug)
+
+
+# ========== vCard Cache ==========
+
+# vcard_utils.RenderedVCard entries keyed by
+# (employee_id, employee.last_updated, company.updated_at)
+vcard_cache = ByteBudgetLRUCache(
+    max_bytes=settings.vcard_cache_bytes,
+    sizeof=lambda rendered: len(rendered.body),
+)
+
+
+# ========== QR Code Cache ==========
+
+# qr_utils.QRImage entries keyed by (content digest,)
+qr_cache = ByteBudgetLRUCache(
+    max_bytes=settings.qr_cache_bytes,
+    sizeof=lambda image: len(image.body),
+)
+
+
+# ========== Principal Cache ==========
+
+# Authenticated users keyed by user id, so get_current_user can skip the
+# users SELECT for every call of a dashboard page load
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl,
+)
+
+
+def invalidate_principal(user_id) -> None:
+    """Drop a cached user after a password, role or activation change."""
+    principal_cache.pop(user_id)
+
+
+def invalidate_company_principals(company_id) -> None:
+    """Drop every cached user of a company (e.g. when the company is deleted)."""
+    principal_cache.invalidate_values_where(lambda user: user.company_id == company_id)
+
+
+# ========== Verified Token Cache ==========
+
+# Decoded JWT claims keyed by a SHA-256 digest of the token. Each entry lives
+# until the token's own `exp`, capped at token_cache_ttl so a SECRET_KEY
+# rotation is picked up within that window
+token_cache = TTLCache(
+    maxsize=settings.token_cache_size,
+    ttl=settings.token_cache_ttl,
+)
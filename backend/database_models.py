@@ -1,5 +1,5 @@
-from sqlalchemy import Column, String, Boolean, DateTime, JSON, ForeignKey, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Boolean, DateTime, Date, BigInteger, JSON, ForeignKey, Index, SmallInteger, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -40,9 +40,17 @@ class Company(Base):
 
 class Employee(Base):
     __tablename__ = "employees"
+    __table_args__ = (
+        # Keyset pagination of a company's employees
+        Index("ix_employees_company_id_created_at_id", "company_id", "created_at", "id"),
+        # Trigram indexes for prefix, substring and fuzzy search (pg_trgm)
+        Index("ix_employees_full_name_trgm", "full_name", postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}),
+        Index("ix_employees_job_title_trgm", "job_title", postgresql_using="gin", postgresql_ops={"job_title": "gin_trgm_ops"}),
+        Index("ix_employees_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False, index=True)
     full_name = Column(String(255), nullable=False)
     job_title = Column(String(255), nullable=True)
     email = Column(String(255), nullable=True)
@@ -73,7 +81,8 @@ class Card(Base):
     __tablename__ = "cards"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id", ondelete="CASCADE"), nullable=False)
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Stored as paths and resolved against the configured bases at response time
     url = Column(Text, nullable=False)
     qr_code = Column(Text, nullable=True)
     vcard_url = Column(Text, nullable=True)
@@ -88,7 +97,7 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=True)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=True, index=True)
     email = Column(String(255), unique=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=True)
@@ -116,12 +125,26 @@ class Subscription(Base):
 
 
 class AnalyticsEvent(Base):
+    """Raw analytics events, list-partitioned by retention tier, then by month.
+
+    `retention_days` is the company's plan window when the event was
+    recorded; each tier is range-partitioned by month on `timestamp`, so
+    retention drops whole partitions. Partitions are created ahead of time by
+    `maintenance.py`; the primary key includes both partition keys, as
+    PostgreSQL requires.
+    """
     __tablename__ = "analytics"
+    __table_args__ = (
+        Index("ix_analytics_company_id_timestamp", "company_id", "timestamp"),
+        Index("ix_analytics_employee_id_timestamp", "employee_id", "timestamp"),
+        {"postgresql_partition_by": "LIST (retention_days)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
     employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id", ondelete="CASCADE"), nullable=True)
-    timestamp = Column(DateTime, server_default=func.now())
+    timestamp = Column(DateTime, primary_key=True, server_default=func.now())
+    retention_days = Column(SmallInteger, primary_key=True)
     device = Column(String(100), nullable=True)
     region = Column(String(100), nullable=True)
     action = Column(String(50), nullable=False)  # view | call | whatsapp | email | download_vcard | scan_qr
@@ -130,3 +153,37 @@ class AnalyticsEvent(Base):
     # Relationships
     company = relationship("Company", back_populates="analytics")
     employee = relationship("Employee", back_populates="analytics")
+
+
+class CardSnapshot(Base):
+    """Denormalized read model of a public card, keyed by its slug pair.
+
+    Rebuilt by the service layer on every employee, company or branding write
+    so public lookups resolve with a single primary-key read and no joins.
+    """
+    __tablename__ = "card_snapshots"
+
+    company_slug = Column(String(255), primary_key=True)
+    employee_slug = Column(String(255), primary_key=True)
+    employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id", ondelete="CASCADE"), unique=True, nullable=False)
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), nullable=False)
+    payload = Column(JSONB, nullable=False)  # BusinessCardResponse in JSON form
+    employee_updated_at = Column(DateTime, nullable=True)
+    company_updated_at = Column(DateTime, nullable=True)
+    refreshed_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class AnalyticsDailyRollup(Base):
+    """Per-company, per-employee, per-day, per-action event counters.
+
+    Maintained incrementally as events are ingested so dashboard summaries do
+    not scan the raw analytics table. Events without an employee are counted
+    under the nil UUID.
+    """
+    __tablename__ = "analytics_daily_rollups"
+
+    company_id = Column(UUID(as_uuid=True), ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    employee_id = Column(UUID(as_uuid=True), primary_key=True)
+    day = Column(Date, primary_key=True)
+    action = Column(String(50), primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
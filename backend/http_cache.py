@@ -0,0 +1,74 @@
+"""Conditional GET helpers: ETag / Last-Modified validators and 304 responses."""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+def make_etag(*version_parts) -> str:
+    """Build a strong ETag from the version fields of a resource."""
+    raw = "|".join(str(part) for part in version_parts)
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def last_modified_of(*timestamps: Optional[datetime]) -> Optional[datetime]:
+    """Return the newest of the given timestamps as UTC, truncated to seconds.
+
+    Database timestamps are naive and stored in UTC.
+    """
+    known = [ts for ts in timestamps if ts is not None]
+    if not known:
+        return None
+    newest = max(ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc) for ts in known)
+    return newest.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    """Headers that let clients revalidate instead of refetching."""
+    headers = {"ETag": etag, "Cache-Control": "public, no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Check the request's conditional headers against the current validators.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+
+    return False
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime]) -> Response:
+    """Empty 304 response carrying the current validators."""
+    return Response(status_code=304, headers=validator_headers(etag, last_modified))
@@ -1,21 +1,66 @@
-import os
+import time
+_imports_started = time.perf_counter()
+
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
-from database import init_db
+import asset_export
+import maintenance
+import services
+from analytics_queue import analytics_writer
+from config import settings
+from database import get_engine, init_db, pin_to_primary
+from migrations import LATEST_VERSION, get_schema_version, run_migrations
 from routes import router
+from startup import startup_report
+
+startup_report.record("imports", time.perf_counter() - _imports_started)
+
 
 # Lifespan event
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("🚀 Starting up... initializing database")
-    await init_db()
+    with startup_report.phase("engine"):
+        get_engine()
+    
+    if settings.fast_start:
+        # Schema is managed out of band (python migrations.py); just verify it
+        startup_report.mode = "fast"
+        print("🚀 Starting up (fast start)... checking schema version")
+        with startup_report.phase("first_connection"):
+            startup_report.schema_version = await get_schema_version()
+    else:
+        startup_report.mode = "full"
+        print("🚀 Starting up... initializing database")
+        with startup_report.phase("first_connection"):
+            await init_db()
+        with startup_report.phase("migrations"):
+            # Offline migrations (table rewrites) are left to `python migrations.py`
+            await run_migrations()
+        startup_report.schema_version = await get_schema_version()
+    
+    if startup_report.schema_version < LATEST_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {startup_report.schema_version}, "
+            f"expected {LATEST_VERSION}; run `python migrations.py` first"
+        )
+    
+    with startup_report.phase("background_tasks"):
+        if not settings.fast_start:
+            # With FAST_START, partitions come from the migrate step and `maintenance.py partitions`
+            maintenance.start_partition_maintenance()
+        analytics_writer.start()
+    print(startup_report.summary())
     yield
     # Shutdown
     print("👋 Shutting down...")
+    await analytics_writer.stop()
+    await services.wait_for_snapshot_refreshes()
+    await maintenance.stop_partition_maintenance()
+    asset_export.shutdown_executor()
 
 
 # Create FastAPI app
@@ -29,7 +74,7 @@ app = FastAPI(
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:8000,http://192.168.1.123:3000,http://192.168.1.123:8000").split(","),
+    allow_origins=settings.cors_origin_list,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -38,9 +83,26 @@ app.add_middleware(
 # Trusted hosts middleware
 app.add_middleware(
     TrustedHostMiddleware,
-    allowed_hosts=os.getenv("ALLOWED_HOSTS", "localhost,127.0.0.1,192.168.1.123").split(","),
+    allowed_hosts=settings.allowed_host_list,
 )
 
+# POSTs that only enqueue work and never change what the client reads back
+UNPINNED_WRITE_PATHS = {"/api/analytics/track"}
+
+
+# Read-your-writes: after a successful write, pin the client's reads to the primary
+@app.middleware("http")
+async def pin_writers_to_primary(request: Request, call_next):
+    response = await call_next(request)
+    if (
+        request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+        and request.url.path not in UNPINNED_WRITE_PATHS
+    ):
+        pin_to_primary(response)
+    return response
+
+
 # Include router
 app.include_router(router)
 
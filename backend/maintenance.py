@@ -0,0 +1,380 @@
+"""
+Analytics partition maintenance and retention, plus one-off data rewrites.
+
+The analytics table is list-partitioned by retention tier (the company's
+plan window in days, fixed when an event is recorded), and each tier is
+range-partitioned by month on `timestamp`. Monthly partitions are created a
+few months ahead, with a default partition per tier catching anything
+outside them. Retention drops, or detaches for archiving, each tier's
+months past that tier's own window, so expiring events never needs
+row-by-row deletes; a plan change applies to events recorded after it.
+Only events whose window is no longer configured (the catch-all default
+partition) are deleted in batches.
+
+Card URLs are stored as paths and made absolute per request; `card-urls`
+rewrites rows saved with an absolute host, in short keyset-ordered batches.
+
+Usage:
+    python maintenance.py partitions                     # create upcoming partitions (cron with FAST_START)
+    python maintenance.py retention [--detach] [--dry-run]
+    python maintenance.py card-urls [--dry-run]          # strip hosts from legacy card URLs
+"""
+
+import asyncio
+import re
+import sys
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import func, or_, select, text, tuple_, update
+
+import database_models as db
+from config import settings
+from database import get_engine
+
+PARENT_TABLE = "analytics"
+# Arbitrary key so only one process creates partitions at a time
+PARTITION_LOCK_ID = 726354902
+DEFAULT_PARTITION = "analytics_default"  # events whose window is no longer configured
+
+# scheme://host[:port] prefix of card URLs stored before they became paths
+ABSOLUTE_URL_PATTERN = "^[a-zA-Z][a-zA-Z0-9+.-]*://[^/]*"
+
+_BOUND_PATTERN = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: Optional[datetime]  # None for a default partition
+    end: Optional[datetime]
+
+
+# ========== Helpers ==========
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def retention_tiers() -> List[int]:
+    """Distinct configured retention windows, in days."""
+    return sorted(set(settings.analytics_retention_days.values()))
+
+def tier_table(days: int) -> str:
+    return f"{PARENT_TABLE}_d{int(days)}"
+
+def partition_name(days: int, month: datetime) -> str:
+    return f"{tier_table(days)}_y{month.year}m{month.month:02d}"
+
+async def table_exists(conn, name: str) -> bool:
+    return await conn.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+
+async def partition_strategy(conn) -> Optional[str]:
+    """How the analytics table is partitioned: "list" (by tier), "range" (by month only) or None."""
+    strategy = await conn.scalar(text("""
+        SELECT p.partstrat::text FROM pg_partitioned_table p
+        JOIN pg_class c ON c.oid = p.partrelid
+        WHERE c.relname = :name
+    """), {"name": PARENT_TABLE})
+    return {"l": "list", "r": "range"}.get(strategy)
+
+async def list_partitions(conn, parent: str) -> List[Partition]:
+    """Attached month partitions of a tier table, oldest first."""
+    result = await conn.execute(text("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+    """), {"parent": parent})
+
+    partitions = []
+    for name, bound in result.all():
+        match = _BOUND_PATTERN.search(bound or "")
+        if match:
+            start, end = (datetime.fromisoformat(value) for value in match.groups())
+            partitions.append(Partition(name, start, end))
+        else:
+            partitions.append(Partition(name, None, None))
+    return sorted(partitions, key=lambda p: p.start or datetime.max)
+
+
+# ========== Partition Creation ==========
+
+async def _create_partition(conn, parent: str, default: str, statements: List[str], rows: str, params: dict) -> None:
+    """Run `statements` (which add a partition of `parent`).
+
+    Rows matching `rows` that already landed in `parent`'s default partition
+    are moved into the new partition (PostgreSQL refuses to attach otherwise).
+    """
+    stray = await table_exists(conn, default) and await conn.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {rows})"), params
+    )
+    if not stray:
+        for statement in statements:
+            await conn.execute(text(statement))
+        return
+
+    await conn.execute(text(f"ALTER TABLE {parent} DETACH PARTITION {default}"))
+    for statement in statements:
+        await conn.execute(text(statement))
+    await conn.execute(text(f"INSERT INTO {parent} SELECT * FROM {default} WHERE {rows}"), params)
+    await conn.execute(text(f"DELETE FROM {default} WHERE {rows}"), params)
+    await conn.execute(text(f"ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT"))
+
+async def ensure_tier(conn, days: int) -> bool:
+    """Create the partition for a retention tier, and its default, if missing."""
+    tier = tier_table(days)
+    if await table_exists(conn, tier):
+        return False
+    await _create_partition(conn, PARENT_TABLE, DEFAULT_PARTITION, [
+        f"CREATE TABLE {tier} PARTITION OF {PARENT_TABLE} FOR VALUES IN ({int(days)}) PARTITION BY RANGE (timestamp)",
+        f"CREATE TABLE {tier}_default PARTITION OF {tier} DEFAULT",
+    ], "retention_days = :days", {"days": days})
+    print(f"✓ Created analytics retention tier {tier}")
+    return True
+
+async def ensure_partition(conn, days: int, month: datetime) -> bool:
+    """Create the tier's partition for `month` if missing. Returns True if created."""
+    tier = tier_table(days)
+    name = partition_name(days, month)
+    if await table_exists(conn, name):
+        return False
+
+    start, end = month, add_months(month, 1)
+    bounds = f"FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    await _create_partition(conn, tier, f"{tier}_default", [
+        f"CREATE TABLE {name} PARTITION OF {tier} FOR VALUES {bounds}",
+    ], "timestamp >= :start AND timestamp < :end", {"start": start, "end": end})
+    print(f"✓ Created analytics partition {name}")
+    return True
+
+async def create_month_partitions(conn, first: datetime, last: datetime) -> int:
+    """Create every tier's monthly partitions covering `first` through `last` (inclusive)."""
+    created = 0
+    for days in retention_tiers():
+        await ensure_tier(conn, days)
+        month = month_start(first)
+        while month <= last:
+            created += await ensure_partition(conn, days, month)
+            month = add_months(month, 1)
+
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"))
+    return created
+
+async def ensure_analytics_partitions(months_ahead: int = None) -> int:
+    """Make sure the current month and the next `months_ahead` have partitions."""
+    if months_ahead is None:
+        months_ahead = settings.analytics_partitions_ahead
+    current = month_start(datetime.utcnow())
+    async with get_engine().begin() as conn:
+        # Another process is already on it; its transaction covers the same months
+        if not await conn.scalar(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID}):
+            return 0
+        if await partition_strategy(conn) != "list":
+            return 0
+        return await create_month_partitions(conn, current, add_months(current, months_ahead))
+
+
+# ========== Retention ==========
+
+async def _delete_unconfigured_events(now: datetime, dry_run: bool) -> int:
+    """Expire events in the catch-all partition by their own window, one batch per transaction."""
+    expired = "timestamp < CAST(:now AS timestamp) - retention_days * INTERVAL '1 day'"
+    async with get_engine().connect() as conn:
+        if not await table_exists(conn, DEFAULT_PARTITION):
+            return 0
+        if dry_run:
+            return await conn.scalar(text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE {expired}"), {"now": now})
+
+    deleted = 0
+    batch_size = settings.analytics_retention_batch_size
+    while True:
+        async with get_engine().begin() as conn:
+            result = await conn.execute(text(f"""
+                DELETE FROM {DEFAULT_PARTITION} WHERE ctid IN (
+                    SELECT ctid FROM {DEFAULT_PARTITION} WHERE {expired} LIMIT :limit
+                )
+            """), {"now": now, "limit": batch_size})
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+async def apply_retention(detach: bool = False, dry_run: bool = False) -> dict:
+    """Expire analytics events past their retention tier's window.
+
+    Monthly partitions entirely older than their tier's window are dropped
+    (or detached, leaving a standalone table to archive). Daily rollups are
+    kept, so summaries still cover the full history.
+    """
+    now = datetime.utcnow()
+    report = {"dropped": [], "detached": [], "deleted": 0}
+
+    async with get_engine().begin() as conn:
+        for days in retention_tiers():
+            tier = tier_table(days)
+            if not await table_exists(conn, tier):
+                continue
+            cutoff = now - timedelta(days=days)
+            for partition in await list_partitions(conn, tier):
+                if partition.end is None or partition.end > cutoff:
+                    continue
+                if dry_run:
+                    report["detached" if detach else "dropped"].append(partition.name)
+                elif detach:
+                    await conn.execute(text(f"ALTER TABLE {tier} DETACH PARTITION {partition.name}"))
+                    report["detached"].append(partition.name)
+                else:
+                    await conn.execute(text(f"DROP TABLE {partition.name}"))
+                    report["dropped"].append(partition.name)
+
+    report["deleted"] = await _delete_unconfigured_events(now, dry_run)
+    return report
+
+
+# ========== Card URL Rewrite ==========
+
+def _strip_host(column):
+    return func.regexp_replace(column, ABSOLUTE_URL_PATTERN, "")
+
+def _is_absolute(column):
+    return column.op("~")(ABSOLUTE_URL_PATTERN)
+
+async def _count_absolute_card_urls(conn) -> dict:
+    card, snapshot = db.Card, db.CardSnapshot
+    return {
+        "cards": await conn.scalar(
+            select(func.count()).select_from(card).where(
+                or_(_is_absolute(card.url), _is_absolute(card.qr_code), _is_absolute(card.vcard_url))
+            )
+        ),
+        "snapshots": await conn.scalar(
+            select(func.count()).select_from(snapshot).where(
+                or_(
+                    _is_absolute(snapshot.payload["qr_code"].astext),
+                    _is_absolute(snapshot.payload["vcard_url"].astext),
+                )
+            )
+        ),
+    }
+
+async def relativize_card_urls(batch_size: int = None, dry_run: bool = False) -> dict:
+    """Rewrite absolute card URLs (cards and their snapshots) to host-independent paths.
+
+    Walks each table in primary-key order and commits every batch separately,
+    so row locks are held briefly and the job can be interrupted and re-run.
+    """
+    if batch_size is None:
+        batch_size = settings.card_url_batch_size
+    if dry_run:
+        async with get_engine().connect() as conn:
+            return await _count_absolute_card_urls(conn)
+
+    card, snapshot = db.Card, db.CardSnapshot
+    report = {"cards": 0, "snapshots": 0}
+
+    last_id = None
+    while True:
+        async with get_engine().begin() as conn:
+            ids = select(card.id).order_by(card.id).limit(batch_size)
+            if last_id is not None:
+                ids = ids.where(card.id > last_id)
+            batch = (await conn.scalars(ids)).all()
+            if not batch:
+                break
+            result = await conn.execute(
+                update(card)
+                .where(
+                    card.id.in_(batch),
+                    or_(_is_absolute(card.url), _is_absolute(card.qr_code), _is_absolute(card.vcard_url)),
+                )
+                .values(
+                    url=_strip_host(card.url),
+                    qr_code=_strip_host(card.qr_code),
+                    vcard_url=_strip_host(card.vcard_url),
+                    updated_at=card.updated_at,  # not a content change
+                )
+            )
+        report["cards"] += result.rowcount
+        last_id = batch[-1]
+
+    last_key = None
+    key = tuple_(snapshot.company_slug, snapshot.employee_slug)
+    qr_code, vcard_url = snapshot.payload["qr_code"].astext, snapshot.payload["vcard_url"].astext
+    while True:
+        async with get_engine().begin() as conn:
+            keys = select(snapshot.company_slug, snapshot.employee_slug).order_by(
+                snapshot.company_slug, snapshot.employee_slug
+            ).limit(batch_size)
+            if last_key is not None:
+                keys = keys.where(key > tuple_(*last_key))
+            batch = (await conn.execute(keys)).all()
+            if not batch:
+                break
+            result = await conn.execute(
+                update(snapshot)
+                .where(key.in_(batch), or_(_is_absolute(qr_code), _is_absolute(vcard_url)))
+                .values(
+                    payload=snapshot.payload.op("||")(
+                        func.jsonb_build_object(
+                            "qr_code", _strip_host(qr_code), "vcard_url", _strip_host(vcard_url)
+                        )
+                    )
+                )
+            )
+        report["snapshots"] += result.rowcount
+        last_key = tuple(batch[-1])
+
+    return report
+
+
+# ========== Background Task ==========
+
+_maintenance_task: Optional[asyncio.Task] = None
+
+async def _run_partition_maintenance(interval: float):
+    while True:
+        try:
+            await ensure_analytics_partitions()
+        except Exception as e:
+            print(f"❌ Analytics partition maintenance failed: {e}")
+        await asyncio.sleep(interval)
+
+def start_partition_maintenance() -> None:
+    """Create upcoming partitions now and re-check periodically."""
+    global _maintenance_task
+    if _maintenance_task is None:
+        _maintenance_task = asyncio.create_task(
+            _run_partition_maintenance(settings.analytics_maintenance_interval)
+        )
+
+async def stop_partition_maintenance() -> None:
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        await asyncio.gather(_maintenance_task, return_exceptions=True)
+        _maintenance_task = None
+
+
+async def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "partitions"
+    if command == "partitions":
+        count = await ensure_analytics_partitions()
+        print(f"✅ Analytics partitions up to date ({count} created)")
+    elif command == "retention":
+        dry_run = "--dry-run" in sys.argv
+        report = await apply_retention(detach="--detach" in sys.argv, dry_run=dry_run)
+        prefix = "Would expire" if dry_run else "Expired"
+        print(f"✅ {prefix}: dropped {report['dropped']}, detached {report['detached']}")
+        print(f"   {report['deleted']} events with a window no longer configured")
+    elif command == "card-urls":
+        dry_run = "--dry-run" in sys.argv
+        report = await relativize_card_urls(dry_run=dry_run)
+        prefix = "Would rewrite" if dry_run else "Rewrote"
+        print(f"✅ {prefix} {report['cards']} cards and {report['snapshots']} card snapshots to relative URLs")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
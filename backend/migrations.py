@@ -1,58 +1,330 @@
 """
-Database migration: Add CMS customization fields to companies and employees
-Run this after updating database_models.py
+Versioned database migrations.
+
+Each migration runs once, in version order, and is recorded in the
+schema_migrations table. Statements are idempotent (IF NOT EXISTS) so a step
+that failed halfway can simply be re-run. Index migrations use
+CREATE INDEX CONCURRENTLY, which cannot run inside a transaction, so they
+execute in autocommit mode without blocking writes to the table.
+
+Offline migrations rewrite whole tables and need analytics ingestion
+paused; app startup stops before them, so they only run from this script.
+A migration whose `needed` check finds the schema already current (e.g. a
+fresh database built by create_all) is just recorded.
+
+Usage:
+    python migrations.py            # create tables and apply pending migrations
+    python migrations.py --status   # show applied and pending versions
 """
 
 import asyncio
+import re
+import sys
+from datetime import datetime
+from typing import Any, Awaitable, Callable, NamedTuple, Optional, Sequence
+
 from sqlalchemy import text
-from database import engine
-
-async def add_company_customization_fields():
-    """Add customization fields to companies table"""
-    async with engine.begin() as conn:
-        # Check if columns exist, if not add them
-        migrations = [
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS brand_secondary_color VARCHAR(7) DEFAULT '#FFFFFF'",
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS background_image_url TEXT",
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS description TEXT",
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS website VARCHAR(255)",
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS phone VARCHAR(20)",
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS email VARCHAR(255)",
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS social_media JSONB DEFAULT '{}'",
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS custom_css TEXT",
-            "ALTER TABLE companies ADD COLUMN IF NOT EXISTS card_template VARCHAR(50) DEFAULT 'default'",
-        ]
-        
-        for migration in migrations:
-            try:
-                await conn.execute(text(migration))
-                print(f"✓ Executed: {migration[:60]}...")
-            except Exception as e:
-                print(f"✗ Migration failed: {migration[:60]}... - {str(e)}")
-
-async def add_employee_customization_fields():
-    """Add customization fields to employees table"""
-    async with engine.begin() as conn:
-        migrations = [
-            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS card_background_color VARCHAR(7)",
-            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS card_text_color VARCHAR(7)",
-            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS card_accent_color VARCHAR(7)",
-            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS card_background_image_url TEXT",
-            "ALTER TABLE employees ADD COLUMN IF NOT EXISTS custom_fields JSONB DEFAULT '{}'",
-        ]
-        
-        for migration in migrations:
-            try:
-                await conn.execute(text(migration))
-                print(f"✓ Executed: {migration[:60]}...")
-            except Exception as e:
-                print(f"✗ Migration failed: {migration[:60]}... - {str(e)}")
+from config import settings
+from database import AsyncSessionLocal, get_engine, init_db
+import database_models as db
+import maintenance
+import services
+
+# Arbitrary key so concurrently starting workers run migrations one at a time
+MIGRATION_LOCK_ID = 726354901
+MIGRATION_LOCK_POLL_SECONDS = 1.0
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    statements: Sequence[str] = ()
+    concurrent: bool = False  # run each statement outside a transaction
+    run: Optional[Callable[[], Awaitable[None]]] = None
+    offline: bool = False  # only run from `python migrations.py`, with ingestion paused
+    needed: Optional[Callable[[Any], Awaitable[bool]]] = None  # False: already in place, just record it
+
+
+# ========== Data Migrations ==========
+
+async def backfill_card_snapshots():
+    """Create the card_snapshots read model and populate it for every company"""
+    async with get_engine().begin() as conn:
+        await conn.run_sync(db.CardSnapshot.__table__.create, checkfirst=True)
+
+    async with AsyncSessionLocal() as session:
+        for company in await services.list_companies(session):
+            count = await services.refresh_company_snapshots(session, company)
+            print(f"✓ Snapshotted {count} cards for {company.slug}")
+
+async def backfill_analytics_rollups():
+    """Create the analytics_daily_rollups table and rebuild it from raw events"""
+    async with get_engine().begin() as conn:
+        await conn.run_sync(db.AnalyticsDailyRollup.__table__.create, checkfirst=True)
+        # Run with analytics ingestion paused; counts are recomputed, not added
+        await conn.execute(text("""
+            INSERT INTO analytics_daily_rollups (company_id, employee_id, day, action, count)
+            SELECT company_id,
+                   COALESCE(employee_id, '00000000-0000-0000-0000-000000000000'::uuid),
+                   timestamp::date,
+                   action,
+                   COUNT(*)
+            FROM analytics
+            GROUP BY 1, 2, 3, 4
+            ON CONFLICT (company_id, employee_id, day, action)
+            DO UPDATE SET count = EXCLUDED.count
+        """))
+    print("✓ Rebuilt analytics rollups")
+
+async def analytics_needs_partitioning(conn) -> bool:
+    return await maintenance.partition_strategy(conn) != "list"
+
+async def partition_analytics_table():
+    """Rebuild analytics as per-retention-tier partitions, each split by month.
+
+    Works from the original heap or the earlier month-only layout. Existing
+    events take their company's current retention window. Run with analytics
+    ingestion paused (`python migrations.py`); the copy holds one transaction.
+    """
+    windows = settings.analytics_retention_days
+    plans = ", ".join(
+        f"(CAST(:plan_{i} AS text), CAST(:days_{i} AS integer))" for i in range(len(windows))
+    )
+    params = {"longest": max(windows.values())}
+    for i, (plan, days) in enumerate(windows.items()):
+        params[f"plan_{i}"], params[f"days_{i}"] = plan, days
+
+    async with get_engine().begin() as conn:
+        if await analytics_needs_partitioning(conn):
+            await conn.execute(text("ALTER TABLE analytics RENAME TO analytics_old"))
+            # Names are schema-wide; free them for the new table
+            await conn.execute(text("ALTER TABLE IF EXISTS analytics_default RENAME TO analytics_old_default"))
+            await conn.execute(text("ALTER TABLE analytics_old RENAME CONSTRAINT analytics_pkey TO analytics_old_pkey"))
+            for name in ("company_id_timestamp", "employee_id_timestamp"):
+                await conn.execute(text(f"ALTER INDEX IF EXISTS ix_analytics_{name} RENAME TO ix_analytics_old_{name}"))
+            await conn.run_sync(db.AnalyticsEvent.__table__.create)
+
+            first, last = (await conn.execute(text("SELECT MIN(timestamp), MAX(timestamp) FROM analytics_old"))).one()
+            now = maintenance.month_start(datetime.utcnow())
+            await maintenance.create_month_partitions(conn, min(first or now, now), max(last or now, now))
+            # Same rule as services.retention_days_for_plans
+            await conn.execute(text(f"""
+                INSERT INTO analytics (id, company_id, employee_id, timestamp, retention_days, device, region, action, ip_address)
+                SELECT a.id, a.company_id, a.employee_id, COALESCE(a.timestamp, now()),
+                       COALESCE(w.days, CAST(:longest AS integer)), a.device, a.region, a.action, a.ip_address
+                FROM analytics_old a
+                LEFT JOIN (
+                    SELECT s.company_id, MAX(COALESCE(p.days, CAST(:longest AS integer))) AS days
+                    FROM subscriptions s
+                    LEFT JOIN (VALUES {plans}) AS p (plan, days) ON p.plan = s.plan
+                    WHERE s.active
+                    GROUP BY s.company_id
+                ) w ON w.company_id = a.company_id
+            """), params)
+            await conn.execute(text("DROP TABLE analytics_old"))
+            print("✓ Partitioned analytics by retention tier and month")
+    await maintenance.ensure_analytics_partitions()
+
+
+# ========== Migration List ==========
+
+MIGRATIONS = [
+    Migration(1, "company customization fields", [
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS brand_secondary_color VARCHAR(7) DEFAULT '#FFFFFF'",
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS background_image_url TEXT",
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS description TEXT",
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS website VARCHAR(255)",
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS phone VARCHAR(20)",
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS email VARCHAR(255)",
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS social_media JSONB DEFAULT '{}'",
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS custom_css TEXT",
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS card_template VARCHAR(50) DEFAULT 'default'",
+    ]),
+    Migration(2, "employee customization fields", [
+        "ALTER TABLE employees ADD COLUMN IF NOT EXISTS card_background_color VARCHAR(7)",
+        "ALTER TABLE employees ADD COLUMN IF NOT EXISTS card_text_color VARCHAR(7)",
+        "ALTER TABLE employees ADD COLUMN IF NOT EXISTS card_accent_color VARCHAR(7)",
+        "ALTER TABLE employees ADD COLUMN IF NOT EXISTS card_background_image_url TEXT",
+        "ALTER TABLE employees ADD COLUMN IF NOT EXISTS custom_fields JSONB DEFAULT '{}'",
+    ]),
+    Migration(3, "card snapshots", run=backfill_card_snapshots),
+    Migration(4, "analytics rollups", run=backfill_analytics_rollups),
+    Migration(5, "index analytics by company and time", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analytics_company_id_timestamp ON analytics (company_id, timestamp)",
+    ], concurrent=True),
+    Migration(6, "index analytics by employee and time", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analytics_employee_id_timestamp ON analytics (employee_id, timestamp)",
+    ], concurrent=True),
+    Migration(7, "index employees by company", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_company_id ON employees (company_id)",
+    ], concurrent=True),
+    Migration(8, "index cards by employee", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cards_employee_id ON cards (employee_id)",
+    ], concurrent=True),
+    Migration(9, "index users by company", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_company_id ON users (company_id)",
+    ], concurrent=True),
+    # Version 10 (month-only partitioning) is retired: 15 converts either the
+    # original heap or that layout in a single copy. Databases that recorded
+    # 10 keep the row; 15 still finds their month-only table and converts it.
+    Migration(11, "backfill employee creation times", [
+        "UPDATE employees SET created_at = COALESCE(last_updated, now()) WHERE created_at IS NULL",
+    ]),
+    Migration(12, "index employees by company and creation order", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_company_id_created_at_id ON employees (company_id, created_at, id)",
+    ], concurrent=True),
+    Migration(13, "trigram extension", [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    ]),
+    Migration(14, "trigram indexes for employee search", [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_full_name_trgm ON employees USING gin (full_name gin_trgm_ops)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_job_title_trgm ON employees USING gin (job_title gin_trgm_ops)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_employees_email_trgm ON employees USING gin (email gin_trgm_ops)",
+    ], concurrent=True),
+    Migration(15, "partition analytics by retention tier", run=partition_analytics_table,
+              offline=True, needed=analytics_needs_partitioning),
+]
+
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+
+# ========== Runner ==========
+
+async def ensure_version_table(conn):
+    await conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT now()
+        )
+    """))
+
+async def get_applied_versions(conn) -> set:
+    result = await conn.execute(text("SELECT version FROM schema_migrations"))
+    return {row[0] for row in result}
+
+async def get_schema_version() -> int:
+    """Return the highest applied migration version (0 if none)."""
+    async with get_engine().connect() as conn:
+        exists = await conn.scalar(text("SELECT to_regclass('schema_migrations') IS NOT NULL"))
+        if not exists:
+            return 0
+        return await conn.scalar(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations"))
+
+async def _index_needs_build(conn, statement: str) -> bool:
+    """Whether a CREATE INDEX CONCURRENTLY statement still has work to do.
+
+    A valid index of that name is skipped outright (tables created by
+    create_all, including partitioned ones that reject CONCURRENTLY, already
+    have it). A failed CONCURRENTLY build leaves an INVALID index that
+    IF NOT EXISTS would skip, so that one is dropped and rebuilt.
+    """
+    match = re.search(r"IF NOT EXISTS (\w+)", statement)
+    if not match:
+        return True
+    valid = await conn.scalar(text("""
+        SELECT i.indisvalid
+        FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = :name
+    """), {"name": match.group(1)})
+    if valid is False:
+        print(f"⚠️  Dropping invalid index {match.group(1)} left by an earlier run")
+        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}"))
+    return valid is not True
+
+async def apply_migration(lock_conn, migration: Migration):
+    if migration.concurrent:
+        # lock_conn is in autocommit mode, as CONCURRENTLY requires
+        for statement in migration.statements:
+            if not await _index_needs_build(lock_conn, statement):
+                print(f"✓ Already present: {statement[:60]}...")
+                continue
+            await lock_conn.execute(text(statement))
+            print(f"✓ Executed: {statement[:60]}...")
+    elif migration.statements:
+        async with get_engine().begin() as conn:
+            for statement in migration.statements:
+                await conn.execute(text(statement))
+                print(f"✓ Executed: {statement[:60]}...")
+
+    if migration.run:
+        await migration.run()
+
+    await record_migration(lock_conn, migration)
+
+async def record_migration(conn, migration: Migration):
+    await conn.execute(
+        text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name) ON CONFLICT DO NOTHING"),
+        {"version": migration.version, "name": migration.name},
+    )
+
+async def acquire_migration_lock(conn) -> None:
+    """Take the migration lock, polling rather than blocking.
+
+    A session blocked inside pg_advisory_lock holds a snapshot, and
+    CREATE INDEX CONCURRENTLY in the lock holder waits for every older
+    snapshot to go away, so a blocking wait would deadlock the two.
+    Between polls (autocommit, no open transaction) we hold none.
+    """
+    waiting = False
+    while not await conn.scalar(text("SELECT pg_try_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}):
+        if not waiting:
+            print("⏳ Waiting for another process to finish migrations...")
+            waiting = True
+        await asyncio.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+async def run_migrations(allow_offline: bool = False) -> int:
+    """Apply pending migrations in order. Returns how many were applied.
+
+    Without `allow_offline`, stops at the first offline migration that still
+    has work to do; later versions wait until it has been run.
+    """
+    applied_count = 0
+    async with get_engine().connect() as conn:
+        lock_conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await acquire_migration_lock(lock_conn)
+        try:
+            await ensure_version_table(lock_conn)
+            applied = await get_applied_versions(lock_conn)
+            for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+                if migration.version in applied:
+                    continue
+                if migration.needed and not await migration.needed(lock_conn):
+                    print(f"✓ Migration {migration.version} already in place: {migration.name}")
+                    await record_migration(lock_conn, migration)
+                    continue
+                if migration.offline and not allow_offline:
+                    print(f"⏸️  Migration {migration.version} ({migration.name}) must be run with "
+                          "`python migrations.py` while analytics ingestion is paused")
+                    break
+                print(f"🔄 Applying migration {migration.version}: {migration.name}")
+                await apply_migration(lock_conn, migration)
+                applied_count += 1
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    return applied_count
+
+async def print_status():
+    async with get_engine().connect() as conn:
+        lock_conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await ensure_version_table(lock_conn)
+        applied = await get_applied_versions(lock_conn)
+    for migration in MIGRATIONS:
+        mark = "✓" if migration.version in applied else "·"
+        print(f"{mark} {migration.version:>4}  {migration.name}")
 
 async def main():
+    if "--status" in sys.argv:
+        await print_status()
+        return
+    # Create missing tables first, so this alone prepares a fresh database
+    # for workers started with FAST_START
+    await init_db()
     print("🔄 Running database migrations...")
-    await add_company_customization_fields()
-    await add_employee_customization_fields()
-    print("✅ Migrations completed!")
+    count = await run_migrations(allow_offline=True)
+    # Fresh databases get their analytics tiers and upcoming months here
+    await maintenance.ensure_analytics_partitions()
+    print(f"✅ Migrations completed! ({count} applied, schema version {LATEST_VERSION})")
 
 if __name__ == "__main__":
     asyncio.run(main())
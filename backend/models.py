@@ -1,5 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, TypeAdapter
 from typing import Optional, List, Dict, Any
+from typing_extensions import TypedDict
 import datetime
 import uuid
 
@@ -44,6 +45,25 @@ class EmployeeCreate(BaseModel):
     social_links: Optional[Dict[str, str]] = None
 
 
+class BulkEmployeeCreated(BaseModel):
+    row: int
+    id: uuid.UUID
+    full_name: str
+    public_slug: str
+
+
+class BulkEmployeeRowError(BaseModel):
+    row: int  # 1-based position among the submitted records
+    errors: List[str]
+
+
+class BulkEmployeeImportResponse(BaseModel):
+    created: int
+    failed: int
+    employees: List[BulkEmployeeCreated]
+    errors: List[BulkEmployeeRowError]
+
+
 class EmployeeUpdate(BaseModel):
     full_name: Optional[str] = None
     job_title: Optional[str] = None
@@ -74,6 +94,50 @@ class EmployeeResponse(BaseModel):
         from_attributes = True
 
 
+class EmployeeRow(TypedDict):
+    """Plain-dict form of EmployeeResponse, as selected by services.EMPLOYEE_ROW_COLUMNS."""
+    id: uuid.UUID
+    company_id: uuid.UUID
+    full_name: str
+    job_title: Optional[str]
+    email: Optional[str]
+    phone: Optional[str]
+    whatsapp: Optional[str]
+    photo_url: Optional[str]
+    bio: Optional[str]
+    social_links: Optional[Dict[str, Any]]
+    public_slug: str
+    last_updated: Optional[datetime.datetime]
+    company_slug: Optional[str]
+
+
+class EmployeeRowPage(TypedDict):
+    items: List[EmployeeRow]
+    next_cursor: Optional[str]
+    estimated_total: Optional[int]
+
+
+# Built once: encoding rows with these skips model instantiation and revalidation
+employee_row_adapter = TypeAdapter(EmployeeRow)
+employee_rows_adapter = TypeAdapter(List[EmployeeRow])
+employee_page_adapter = TypeAdapter(EmployeeRowPage)
+
+
+class EmployeeSearchResult(BaseModel):
+    id: uuid.UUID
+    full_name: str
+    job_title: Optional[str]
+    email: Optional[str]
+    public_slug: str
+    score: float
+
+
+class EmployeePage(BaseModel):
+    items: List[EmployeeResponse]
+    next_cursor: Optional[str] = None  # None on the last page
+    estimated_total: Optional[int] = None
+
+
 class BusinessCardResponse(BaseModel):
     employee_id: uuid.UUID
     employee_name: str
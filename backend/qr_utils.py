@@ -0,0 +1,175 @@
+"""QR code rendering (PNG / SVG) with content-addressed memory and disk caches.
+
+Sizes are snapped to a few fixed buckets and the disk cache is bounded, so
+client-chosen render options cannot create unbounded work or files.
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import segno
+
+from cache import qr_cache
+from config import settings
+
+QR_CACHE_DIR = Path(settings.qr_cache_dir or os.path.join(tempfile.gettempdir(), "digital-cards-qr"))
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+ERROR_LEVELS = ("l", "m", "q", "h")
+SIZE_BUCKETS = (128, 256, 400, 512, 1024)
+
+
+def snap_size(size: int) -> int:
+    """The smallest size bucket that is at least `size` (the largest if none is)."""
+    for bucket in SIZE_BUCKETS:
+        if bucket >= size:
+            return bucket
+    return SIZE_BUCKETS[-1]
+
+
+class QRImage(NamedTuple):
+    """Rendered QR image and its content address."""
+    body: bytes
+    media_type: str
+    digest: str
+
+
+def qr_digest(data: str, fmt: str, size: int, error: str, border: int) -> str:
+    """Content address of a QR rendering: the encoded data plus render options."""
+    raw = f"{data}\x00{fmt}\x00{size}\x00{error}\x00{border}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def render_qr(data: str, fmt: str = "png", size: int = 400, error: str = "m", border: int = 4) -> bytes:
+    """
+    Encode `data` as a QR code image.
+
+    Args:
+        data: Text to encode (usually a URL)
+        fmt: Output format, "png" or "svg"
+        size: Target width/height in pixels (rounded down to whole modules)
+        error: Error correction level (l, m, q, h)
+        border: Quiet zone width in modules
+
+    Returns:
+        Encoded image bytes
+    """
+    qr = segno.make(data, error=error, micro=False)
+    width, _ = qr.symbol_size(scale=1, border=border)
+    scale = max(1, size // width)
+
+    buffer = io.BytesIO()
+    qr.save(buffer, kind=fmt, scale=scale, border=border)
+    return buffer.getvalue()
+
+
+def get_cached_qr(digest: str) -> Optional[QRImage]:
+    """Look up a rendered QR image in the in-memory cache."""
+    return qr_cache.get((digest,))
+
+
+def load_or_render_qr(data: str, fmt: str = "png", size: int = 400, error: str = "m", border: int = 4) -> QRImage:
+    """Return a QR image from memory, then disk, rendering it only on a full miss.
+
+    Blocking (disk I/O and CPU-bound encoding); call it from a worker thread.
+    """
+    digest = qr_digest(data, fmt, size, error, border)
+    image = get_cached_qr(digest)
+    if image:
+        return image
+
+    path = QR_CACHE_DIR / digest[:2] / f"{digest}.{fmt}"
+    try:
+        body = path.read_bytes()
+        os.utime(path)  # mtime doubles as the last-used time for pruning
+    except OSError:
+        body = render_qr(data, fmt, size, error, border)
+        if _write_atomic(path, body):
+            _disk_usage.add(len(body))
+
+    image = QRImage(body=body, media_type=MEDIA_TYPES[fmt], digest=digest)
+    qr_cache.set((digest,), image)
+    return image
+
+
+def _write_atomic(path: Path, body: bytes) -> bool:
+    """Write a cache file so concurrent readers never see a partial image."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(body)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        # The disk cache is an optimization; serving from memory is still fine
+        print(f"⚠️  Could not write QR cache file {path}: {e}")
+        return False
+
+
+class DiskUsage:
+    """Approximate size of the QR disk cache, pruned back under a byte budget.
+
+    The directory is scanned once on first use and after each prune; between
+    scans new files are counted as they are written. Files used least
+    recently (oldest mtime) are removed first, down to 90% of the budget.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.current_bytes: Optional[int] = None
+        self.pruned = 0
+        self._lock = threading.Lock()
+
+    def _files(self):
+        files = []
+        for path in self.directory.glob("*/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def add(self, size: int) -> None:
+        with self._lock:
+            if self.current_bytes is None:
+                self.current_bytes = sum(size for _, size, _ in self._files())
+            else:
+                self.current_bytes += size
+            if self.current_bytes > self.max_bytes:
+                self._prune()
+
+    def _prune(self) -> None:
+        files = sorted(self._files(), key=lambda entry: entry[0])
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            self.pruned += 1
+        self.current_bytes = total
+
+
+_disk_usage = DiskUsage(QR_CACHE_DIR, settings.qr_cache_dir_bytes)
+
+
+def disk_cache_stats() -> dict:
+    return {
+        "bytes": _disk_usage.current_bytes,
+        "max_bytes": _disk_usage.max_bytes,
+        "pruned": _disk_usage.pruned,
+    }
@@ -0,0 +1,109 @@
+"""In-memory sliding-window rate limiting (login brute-force protection)."""
+import time
+from collections import OrderedDict, deque
+from ipaddress import ip_address
+from typing import Hashable
+
+from fastapi import Request
+
+from config import settings
+
+
+class SlidingWindowLimiter:
+    """Allow at most `limit` hits per key in any `window` seconds.
+
+    Memory is bounded: keys are kept in least-recently-hit order, idle keys
+    are dropped once their window has passed, and the oldest keys are evicted
+    beyond `max_keys`.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 100_000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._hits: "OrderedDict[Hashable, deque]" = OrderedDict()
+        self.rejected = 0
+
+    def _prune(self, key: Hashable, now: float) -> deque:
+        hits = self._hits.get(key)
+        if hits is None:
+            return deque()
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        if not hits:
+            del self._hits[key]
+        return hits
+
+    def retry_after(self, key: Hashable) -> float:
+        """Seconds until `key` may try again (0 if it is under the limit)."""
+        now = time.monotonic()
+        hits = self._prune(key, now)
+        if len(hits) < self.limit:
+            return 0.0
+        self.rejected += 1
+        return hits[0] + self.window - now
+
+    def hit(self, key: Hashable) -> None:
+        """Record one attempt for `key`."""
+        now = time.monotonic()
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = deque(maxlen=self.limit)
+        hits.append(now)
+        self._hits.move_to_end(key)
+
+        # Least recently hit keys sit at the front; drop the ones gone idle
+        while self._hits:
+            oldest_key, oldest_hits = next(iter(self._hits.items()))
+            if len(self._hits) > self.max_keys or oldest_hits[-1] <= now - self.window:
+                del self._hits[oldest_key]
+            else:
+                break
+
+    def reset(self, key: Hashable) -> None:
+        """Forget all attempts for `key` (e.g. after a successful login)."""
+        self._hits.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "tracked_keys": len(self._hits),
+            "limit": self.limit,
+            "window_seconds": self.window,
+            "rejected": self.rejected,
+        }
+
+
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in settings.trusted_proxy_networks)
+
+
+def client_ip(request: Request) -> str:
+    """The caller's IP address.
+
+    X-Forwarded-For is only honoured when the direct peer is a trusted proxy
+    (TRUSTED_PROXIES); the client is then the right-most hop that is not one
+    of our proxies, since anything left of it can be set by the caller.
+    """
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or not is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+login_limiter_by_email = SlidingWindowLimiter(
+    limit=settings.login_max_attempts_per_email,
+    window=settings.login_window_seconds,
+)
+login_limiter_by_ip = SlidingWindowLimiter(
+    limit=settings.login_max_attempts_per_ip,
+    window=settings.login_window_seconds,
+)
@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Header, Body
-from fastapi.responses import FileResponse, RedirectResponse, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Body, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Union
+import csv
+import io
+import json
+import math
 import uuid
-import urllib.parse
 
+import asset_export
 import services
 import models
+import qr_utils
 import vcard_utils
-from database import get_db
-from security import create_access_token, decode_token, verify_password, hash_password
+from analytics_queue import analytics_writer
+from cache import CachedCard, card_cache, principal_cache, qr_cache, token_cache, vcard_cache, invalidate_card, invalidate_company_cards, invalidate_principal
+from config import settings
+from database import get_db, get_read_db
+from rate_limit import client_ip, login_limiter_by_email, login_limiter_by_ip
+from http_cache import is_not_modified, last_modified_of, make_etag, not_modified_response, validator_headers
+from security import create_access_token, decode_token, hash_password_async, hashing_stats, needs_rehash, verify_password_async
+from startup import startup_report
 
 router = APIRouter(prefix="/api", tags=["digital-cards"])
 
@@ -52,9 +65,13 @@ async def get_current_user(
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
     
-    user = await services.get_user_by_id(db, user_id)
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+    # Short-lived principal cache; user writes evict entries (see services)
+    user = principal_cache.get(user_id)
+    if user is None:
+        user = await services.get_user_by_id(db, user_id)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal_cache.set(user_id, user)
     
     return {"user_id": user_id, "company_id": company_id, "role": role, "user": user}
 
@@ -67,6 +84,43 @@ async def health_check():
     return {"status": "ok"}
 
 
+@router.get("/health/cache")
+async def cache_stats():
+    """Report in-process cache counters."""
+    return {
+        "card_cache": card_cache.stats(),
+        "vcard_cache": vcard_cache.stats(),
+        "qr_cache": qr_cache.stats(),
+        "qr_disk_cache": qr_utils.disk_cache_stats(),
+        "principal_cache": principal_cache.stats(),
+        "token_cache": token_cache.stats(),
+    }
+
+
+@router.get("/health/hashing")
+async def password_hashing_stats():
+    """Report bcrypt pool concurrency and queue-wait metrics."""
+    return {
+        **hashing_stats(),
+        "login_throttle": {
+            "by_email": login_limiter_by_email.stats(),
+            "by_ip": login_limiter_by_ip.stats(),
+        },
+    }
+
+
+@router.get("/health/startup")
+async def startup_timing():
+    """Where this worker's startup time went (imports, engine, first connection, ...)."""
+    return startup_report.as_dict()
+
+
+@router.get("/health/analytics-queue")
+async def analytics_queue_stats():
+    """Report write-behind analytics queue counters."""
+    return analytics_writer.stats()
+
+
 @router.post("/auth/signup", response_model=models.TokenResponse)
 async def signup(user_data: models.UserCreate, db: AsyncSession = Depends(get_db)):
     """Sign up a new user (company admin)."""
@@ -119,13 +173,14 @@ async def change_password(
         raise HTTPException(status_code=404, detail="User not found")
     
     # Verify current password
-    if not verify_password(current_password, user.password_hash):
+    if not await verify_password_async(current_password, user.password_hash):
         raise HTTPException(status_code=401, detail="Current password is incorrect")
     
     # Update password
-    user.password_hash = hash_password(new_password)
+    user.password_hash = await hash_password_async(new_password)
     db.add(user)
     await db.commit()
+    invalidate_principal(user_id)
     
     return {"message": "Password changed successfully"}
 
@@ -157,12 +212,41 @@ async def reset_password_request(
 
 
 @router.post("/auth/login", response_model=models.TokenResponse)
-async def login(credentials: models.UserLogin, db: AsyncSession = Depends(get_db)):
-    """Login user."""
+async def login(credentials: models.UserLogin, request: Request, db: AsyncSession = Depends(get_db)):
+    """Login user.
+    
+    Attempts are throttled per email and per client IP; requests over the
+    limit are rejected with 429 before any bcrypt work is done. Only failed
+    attempts count against the IP, so many users behind one address (or the
+    frontend server, if it is not a trusted proxy) can still log in.
+    """
+    email_key = credentials.email.lower()
+    ip_key = client_ip(request)
+    retry_after = max(
+        login_limiter_by_email.retry_after(email_key),
+        login_limiter_by_ip.retry_after(ip_key),
+    )
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    login_limiter_by_email.hit(email_key)
+    
     user = await services.get_user_by_email(db, credentials.email)
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user or not await verify_password_async(credentials.password, user.password_hash):
+        login_limiter_by_ip.hit(ip_key)
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    login_limiter_by_email.reset(email_key)
+    
+    # Upgrade hashes made with an older work factor while we have the plaintext
+    if needs_rehash(user.password_hash):
+        user.password_hash = await hash_password_async(credentials.password)
+        db.add(user)
+        await db.commit()
+    
     access_token = create_access_token(
         user_id=user.id,
         company_id=user.company_id,
@@ -180,36 +264,50 @@ async def login(credentials: models.UserLogin, db: AsyncSession = Depends(get_db
 
 # ========== Public Card View ==========
 
+def _card_validators(snapshot, kind: str = "card"):
+    """ETag and Last-Modified for a card, derived from its version timestamps."""
+    etag = make_etag(
+        kind,
+        snapshot.employee_id,
+        snapshot.employee_updated_at,
+        snapshot.company_updated_at,
+    )
+    return etag, last_modified_of(snapshot.employee_updated_at, snapshot.company_updated_at)
+
+
 @router.get("/card/{company_slug}/{employee_slug}", response_model=models.BusinessCardResponse)
 async def get_public_card(
     company_slug: str,
     employee_slug: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get public digital card view (no auth required)."""
-    employee = await services.get_employee_by_slug(db, company_slug, employee_slug)
-    if not employee:
-        raise HTTPException(status_code=404, detail="Card not found")
+    """Get public digital card view (no auth required).
     
-    card = await services.get_card_by_employee(db, employee.id)
-    
-    return models.BusinessCardResponse(
-        employee_id=employee.id,
-        employee_name=employee.full_name,
-        company_name=employee.company.name,
-        company_id=employee.company.id,
-        job_title=employee.job_title,
-        email=employee.email,
-        phone=employee.phone,
-        whatsapp=employee.whatsapp,
-        bio=employee.bio,
-        photo_url=employee.photo_url,
-        social_links=employee.social_links,
-        qr_code=card.qr_code if card else None,
-        vcard_url=card.vcard_url if card else None,
-        company_logo=employee.company.logo_url,
-        company_brand_color=employee.company.brand_color,
-    )
+    Supports conditional requests: a matching If-None-Match or
+    If-Modified-Since is answered with 304 before the card is serialized.
+    """
+    cache_key = (company_slug, employee_slug)
+    cached = card_cache.get(cache_key)
+    if cached is None:
+        snapshot = await services.get_card_snapshot(db, company_slug, employee_slug, persist=False)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="Card not found")
+        
+        etag, last_modified = _card_validators(snapshot)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        
+        # Stored card URLs are paths; make them absolute for this deployment
+        card = models.BusinessCardResponse(**services.resolve_card_urls(snapshot.payload))
+        cached = CachedCard(card, etag, last_modified)
+        card_cache.set(cache_key, cached)
+    elif is_not_modified(request, cached.etag, cached.last_modified):
+        return not_modified_response(cached.etag, cached.last_modified)
+    
+    response.headers.update(validator_headers(cached.etag, cached.last_modified))
+    return cached.card
 
 
 # ========== Company Admin Routes ==========
@@ -275,6 +373,11 @@ async def update_company_endpoint(
 
 # ========== Employee Routes ==========
 
+def _employee_json(adapter, data) -> Response:
+    """Encode employee rows straight to JSON bytes with a prebuilt TypeAdapter."""
+    return Response(content=adapter.dump_json(data, warnings=False), media_type="application/json")
+
+
 @router.post("/company/{company_id}/employees", response_model=models.EmployeeResponse)
 async def create_employee_endpoint(
     company_id: uuid.UUID,
@@ -287,34 +390,124 @@ async def create_employee_endpoint(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     employee = await services.create_employee(db, company_id, employee_data)
-    # Convert to dict and add company slug
-    emp_data = models.EmployeeResponse.from_orm(employee).dict()
-    if hasattr(employee, 'company') and employee.company:
-        emp_data['company_slug'] = employee.company.slug
-    return emp_data
+    return _employee_json(models.employee_row_adapter, services.employee_row(employee))
+
+
+def _parse_bulk_records(body: bytes, content_type: str) -> list:
+    """Decode a bulk import body: a JSON array of objects, or CSV with a header row."""
+    if "csv" in content_type:
+        try:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+        records = []
+        for row in reader:
+            # Blank cells mean "not set"; social_links is a JSON object column
+            record = {key.strip(): value.strip() or None for key, value in row.items() if key and value is not None}
+            if record.get("social_links"):
+                try:
+                    record["social_links"] = json.loads(record["social_links"])
+                except json.JSONDecodeError:
+                    pass  # reported by row validation
+            records.append(record)
+        return records
+    
+    try:
+        records = json.loads(body)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+    if not isinstance(records, list):
+        raise HTTPException(status_code=400, detail="JSON body must be an array of employee objects")
+    return records
 
 
-@router.get("/company/{company_id}/employees", response_model=List[models.EmployeeResponse])
+@router.post("/company/{company_id}/employees/bulk", response_model=models.BulkEmployeeImportResponse)
+async def bulk_create_employees_endpoint(
+    company_id: uuid.UUID,
+    request: Request,
+    atomic: bool = Query(False),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Import many employees at once from CSV (text/csv) or a JSON array.
+    
+    Valid rows are inserted together with their cards in one transaction and
+    invalid rows are reported by position. With atomic=true nothing is
+    inserted unless every row is valid.
+    """
+    if current_user["company_id"] != company_id and current_user["role"] != "superadmin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    company = await services.get_company_by_id(db, company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    
+    records = _parse_bulk_records(await request.body(), request.headers.get("content-type", ""))
+    if len(records) > settings.bulk_import_max_rows:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.bulk_import_max_rows} employees per import",
+        )
+    
+    return await services.bulk_create_employees(db, company, records, atomic=atomic)
+
+
+@router.get("/company/{company_id}/employees/search", response_model=List[models.EmployeeSearchResult])
+async def search_employees_endpoint(
+    company_id: uuid.UUID,
+    q: str = Query(..., min_length=services.MIN_SEARCH_LENGTH, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Search a company's employees by name, job title or email, best matches first."""
+    if current_user["company_id"] != company_id and current_user["role"] != "superadmin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if len(q.strip()) < services.MIN_SEARCH_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Search needs at least {services.MIN_SEARCH_LENGTH} characters")
+    
+    return await services.search_employees(db, company_id, q, limit)
+
+
+@router.get(
+    "/company/{company_id}/employees",
+    response_model=Union[List[models.EmployeeResponse], models.EmployeePage],
+)
 async def list_employees_endpoint(
     company_id: uuid.UUID,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(False),
     current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """List employees for a company."""
+    """List employees for a company.
+    
+    By default returns a plain list paged with skip/limit. With
+    pagination=cursor (or any `cursor`), returns a page object whose
+    `next_cursor` fetches the following page; include_total=true adds a
+    planner-estimated total instead of counting every row.
+    """
     if current_user["company_id"] != company_id and current_user["role"] != "superadmin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    employees = await services.list_employees(db, company_id, skip, limit)
-    # Add company slug to each employee
-    result = []
-    for employee in employees:
-        emp_data = models.EmployeeResponse.from_orm(employee).dict()
-        if hasattr(employee, 'company') and employee.company:
-            emp_data['company_slug'] = employee.company.slug
-        result.append(emp_data)
-    return result
+    # Rows carry only the response columns (company slug joined in) and are
+    # encoded directly, skipping ORM loading and response_model revalidation
+    if pagination == "cursor" or cursor:
+        try:
+            rows, next_cursor = await services.list_employees_page(db, company_id, limit, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        estimated_total = await services.estimate_employee_count(db, company_id) if include_total else None
+        return _employee_json(
+            models.employee_page_adapter,
+            {"items": rows, "next_cursor": next_cursor, "estimated_total": estimated_total},
+        )
+    
+    rows = await services.list_employee_rows(db, company_id, skip, limit)
+    return _employee_json(models.employee_rows_adapter, rows)
 
 
 @router.get("/employees/{employee_id}", response_model=models.EmployeeResponse)
@@ -324,19 +517,15 @@ async def get_employee_endpoint(
     db: AsyncSession = Depends(get_db),
 ):
     """Get employee details."""
-    employee = await services.get_employee_by_id(db, employee_id)
+    employee = await services.get_employee_row(db, employee_id)
     if not employee:
         raise HTTPException(status_code=404, detail="Employee not found")
     
     # Multi-tenant check
-    if employee.company_id != current_user["company_id"] and current_user["role"] != "superadmin":
+    if employee["company_id"] != current_user["company_id"] and current_user["role"] != "superadmin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    # Convert to dict and add company slug
-    emp_data = models.EmployeeResponse.from_orm(employee).dict()
-    if hasattr(employee, 'company') and employee.company:
-        emp_data['company_slug'] = employee.company.slug
-    return emp_data
+    return _employee_json(models.employee_row_adapter, employee)
 
 
 @router.put("/employees/{employee_id}", response_model=models.EmployeeResponse)
@@ -397,8 +586,10 @@ async def delete_employee_endpoint(
 @router.get("/company/{company_id}/branding")
 async def get_company_branding(
     company_id: uuid.UUID,
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get company branding settings (admin only)."""
     # Verify user owns this company
@@ -409,6 +600,12 @@ async def get_company_branding(
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
+    etag = make_etag("branding-admin", company.id, company.updated_at)
+    last_modified = last_modified_of(company.updated_at)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    
     return {
         "brand_color": company.brand_color or "#3B82F6",
         "logo_url": company.logo_url,
@@ -457,21 +654,18 @@ async def track_analytics(
     event_data: models.AnalyticsEventCreate,
     company_slug: str = Query(...),
     employee_slug: str = Query(...),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Track an analytics event (public, no auth required)."""
-    employee = await services.get_employee_by_slug(db, company_slug, employee_slug)
-    if not employee:
+    card = await services.get_card_ids(db, company_slug, employee_slug)
+    if not card:
         raise HTTPException(status_code=404, detail="Card not found")
     
-    event = await services.track_event(
-        db,
-        employee.company_id,
-        employee.id,
-        event_data,
-    )
+    row = services.build_event_row(card.company_id, event_data, card.employee_id)
+    if not await analytics_writer.enqueue(row):
+        raise HTTPException(status_code=503, detail="Analytics queue is full")
     
-    return {"status": "tracked", "event_id": event.id}
+    return {"status": "tracked", "event_id": row["id"]}
 
 
 @router.get("/analytics/company/{company_id}")
@@ -479,19 +673,25 @@ async def get_company_analytics(
     company_id: uuid.UUID,
     skip: int = Query(0, ge=0),
     limit: int = Query(1000, ge=1, le=10000),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
     current_user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get analytics for a company."""
     if current_user["company_id"] != company_id and current_user["role"] != "superadmin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    events = await services.get_analytics_by_company(db, company_id, skip, limit)
+    events = await services.get_analytics_by_company(
+        db, company_id, skip, limit, start=_as_utc_naive(start), end=_as_utc_naive(end)
+    )
+    # Counts come from the daily rollups; only the requested page touches raw events
     summary = await services.get_analytics_summary(db, company_id)
     
     return {
         "events": [models.AnalyticsResponse.from_orm(e) for e in events],
         "summary": summary,
+        "total_events": sum(summary.values()),
     }
 
 
@@ -500,8 +700,10 @@ async def get_employee_analytics(
     employee_id: uuid.UUID,
     skip: int = Query(0, ge=0),
     limit: int = Query(1000, ge=1, le=10000),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
     current_user: dict = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get analytics for an employee."""
     employee = await services.get_employee_by_id(db, employee_id)
@@ -511,62 +713,136 @@ async def get_employee_analytics(
     if employee.company_id != current_user["company_id"] and current_user["role"] != "superadmin":
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    events = await services.get_analytics_by_employee(db, employee_id, skip, limit)
+    events = await services.get_analytics_by_employee(
+        db, employee_id, skip, limit, start=_as_utc_naive(start), end=_as_utc_naive(end)
+    )
     
     return {
         "events": [models.AnalyticsResponse.from_orm(e) for e in events],
     }
 
 
+EXPORT_COLUMNS = ["id", "timestamp", "employee_id", "action", "device", "region"]
+
+
+def _as_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Analytics timestamps are stored as naive UTC."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def _encode_export(pages: AsyncIterator[list], fmt: str) -> AsyncIterator[str]:
+    """Encode keyset pages of analytics rows as NDJSON or CSV, one page per chunk."""
+    if fmt == "csv":
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+    async for rows in pages:
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows:
+                writer.writerow([
+                    row.id,
+                    row.timestamp.isoformat() if row.timestamp else "",
+                    row.employee_id or "",
+                    row.action,
+                    row.device or "",
+                    row.region or "",
+                ])
+            yield buffer.getvalue()
+        else:
+            yield "".join(
+                json.dumps({
+                    "id": str(row.id),
+                    "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+                    "employee_id": str(row.employee_id) if row.employee_id else None,
+                    "action": row.action,
+                    "device": row.device,
+                    "region": row.region,
+                }) + "\n"
+                for row in rows
+            )
+
+
+@router.get("/analytics/company/{company_id}/export")
+async def export_company_analytics(
+    company_id: uuid.UUID,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    action: Optional[str] = Query(None),
+    employee_id: Optional[uuid.UUID] = Query(None),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Stream a company's analytics events as NDJSON or CSV.
+    
+    Events are read in keyset pages ordered by (timestamp, id), so memory use
+    is constant regardless of how large the history is. `start` is inclusive
+    and `end` exclusive.
+    """
+    if current_user["company_id"] != company_id and current_user["role"] != "superadmin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    pages = services.iter_analytics_events(
+        db,
+        company_id,
+        start=_as_utc_naive(start),
+        end=_as_utc_naive(end),
+        action=action,
+        employee_id=employee_id,
+    )
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _encode_export(pages, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="analytics-{company_id}.{format}"'},
+    )
+
+
 # ========== vCard & QR Code Routes ==========
 
 @router.get("/card/{company_slug}/{employee_slug}/vcard")
 async def get_vcard(
     company_slug: str,
     employee_slug: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Download vCard file for a business card (RFC 3.0 format).
     
     This endpoint returns a .vcf file that can be imported into contacts apps.
     When accessed, it triggers a download of the vCard file.
     """
-    # Get employee and verify card exists
-    employee = await services.get_employee_by_slug(db, company_slug, employee_slug)
-    if not employee:
+    # Resolve the card and verify it exists
+    snapshot = await services.get_card_snapshot(db, company_slug, employee_slug, persist=False)
+    if not snapshot:
         raise HTTPException(status_code=404, detail="Card not found")
     
-    # Generate vCard content
-    vcard_content = vcard_utils.generate_vcard(
-        full_name=employee.full_name,
-        job_title=employee.job_title,
-        email=employee.email,
-        phone=employee.phone,
-        whatsapp=employee.whatsapp,
-        company_name=employee.company.name if employee.company else None,
-        photo_url=employee.photo_url,
-        bio=employee.bio,
-        social_links=employee.social_links,
-    )
-    
-    # Track analytics event
-    await services.track_event(
-        db,
-        employee.company_id,
+    # Track analytics event (a revalidated download is still a download)
+    await analytics_writer.enqueue(services.build_event_row(
+        snapshot.company_id,
         models.AnalyticsEventCreate(
             action="download_vcard",
         ),
-        employee.id,
-    )
+        snapshot.employee_id,
+    ))
+    
+    etag, last_modified = _card_validators(snapshot, "vcard")
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    
+    # Serve pre-encoded bytes; a new employee or company version misses the cache
+    cache_key = (snapshot.employee_id, snapshot.employee_updated_at, snapshot.company_updated_at)
+    rendered = vcard_cache.get(cache_key)
+    if rendered is None:
+        rendered = vcard_utils.render_vcard_file(snapshot.payload)
+        vcard_cache.set(cache_key, rendered)
     
-    # Return as downloadable file
-    filename = f"{employee.full_name.replace(' ', '_')}.vcf"
     return Response(
-        content=vcard_content.encode('utf-8'),
+        content=rendered.body,
         media_type="text/vcard; charset=utf-8",
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"'
-        },
+        headers={**rendered.headers, **validator_headers(etag, last_modified)},
     )
 
 
@@ -574,44 +850,88 @@ async def get_vcard(
 async def get_qr_vcard(
     company_slug: str,
     employee_slug: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    format: str = Query("png", pattern="^(png|svg)$"),
+    size: int = Query(400, ge=64, le=2048),
+    ecc: str = Query("m", pattern="^[lmqhLMQH]$"),
+    border: int = Query(4, ge=0, le=16),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Generate QR code that links to vCard download.
     
     This endpoint generates a QR code image that, when scanned, directs users
     to the vCard download endpoint. Users can then save the contact to their device.
     
-    The QR code is generated server-side and returned as a redirect to the QR Server API.
+    The QR code is rendered locally as PNG or SVG and cached by content
+    address in memory and on disk, so each card is encoded only once.
+    `size` is rounded up to a fixed bucket (at most 1024 px), and the ETag
+    is derived from the options alone, so revalidations skip rendering.
     """
-    # Get employee and verify card exists
-    employee = await services.get_employee_by_slug(db, company_slug, employee_slug)
-    if not employee:
+    # Resolve the card and verify it exists
+    card = await services.get_card_ids(db, company_slug, employee_slug)
+    if not card:
         raise HTTPException(status_code=404, detail="Card not found")
     
-    # Build vCard URL using environment variables for dynamic configuration
-    import os
-    API_HOST = os.getenv("API_HOST", "localhost")
-    API_PORT = os.getenv("API_PORT", "8000")
-    ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
-    PROTOCOL = "https" if ENVIRONMENT == "production" else "http"
-    
-    vcard_url = f"{PROTOCOL}://{API_HOST}:{API_PORT}/api/card/{company_slug}/{employee_slug}/vcard"
-    
-    # Generate QR code URL from QR Server API
-    qr_image_url = f"https://api.qrserver.com/v1/create-qr-code/?size=400x400&data={urllib.parse.quote(vcard_url)}"
+    vcard_url = services.build_card_urls(company_slug, employee_slug)["vcard_url"]
     
     # Track analytics event
-    await services.track_event(
-        db,
-        employee.company_id,
+    await analytics_writer.enqueue(services.build_event_row(
+        card.company_id,
         models.AnalyticsEventCreate(
             action="scan_qr",
         ),
-        employee.id,
-    )
+        card.employee_id,
+    ))
+    
+    ecc = ecc.lower()
+    size = qr_utils.snap_size(size)
+    digest = qr_utils.qr_digest(vcard_url, format, size, ecc, border)
+    etag = f'"{digest[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if is_not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    
+    image = qr_utils.get_cached_qr(digest)
+    if image is None:
+        # Disk reads and encoding are blocking; keep them off the event loop
+        image = await run_in_threadpool(qr_utils.load_or_render_qr, vcard_url, format, size, ecc, border)
+    
+    return Response(content=image.body, media_type=image.media_type, headers=headers)
+
+
+# ========== Bulk Asset Export ==========
+
+@router.get("/company/{company_id}/assets/export")
+async def export_company_assets(
+    company_id: uuid.UUID,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream a QR + vCard export of every employee card as a ZIP (admin only).
+    
+    The archive holds vcards/<slug>.vcf, qr/<slug>.png and a closing
+    manifest.json. X-Export-Total gives the number of cards up front, so
+    clients can show progress as entries arrive.
+    """
+    if current_user["company_id"] != company_id and current_user["role"] != "superadmin":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if current_user["role"] not in ["admin", "superadmin"]:
+        raise HTTPException(status_code=403, detail="Only admins can export assets")
+    
+    company = await services.get_company_by_id(db, company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
     
-    # Redirect to QR Server API to get the image
-    return RedirectResponse(url=qr_image_url)
+    total = await services.count_card_snapshots(db, company.slug)
+    batches = services.iter_card_snapshot_batches(db, company.slug, asset_export.EXPORT_BATCH_SIZE)
+    return StreamingResponse(
+        asset_export.stream_assets_zip(company.slug, total, batches),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{company.slug}-assets.zip"',
+            "X-Export-Total": str(total),
+        },
+    )
 
 
 # ========== CMS Customization Endpoints ==========
@@ -634,6 +954,8 @@ async def update_company_branding(
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
+    previous_slug = company.slug
+    
     # Update branding fields
     for field, value in branding_data.items():
         if hasattr(company, field):
@@ -642,6 +964,10 @@ async def update_company_branding(
     db.add(company)
     await db.commit()
     await db.refresh(company)
+    # Rebuilding every employee's snapshot can take long; keep it out of the request
+    services.schedule_company_snapshot_refresh(company.id)
+    invalidate_company_cards(previous_slug)
+    invalidate_company_cards(company.slug)
     
     return company
 
@@ -649,7 +975,9 @@ async def update_company_branding(
 @router.get("/company/{company_id}/branding")
 async def get_company_branding(
     company_id: str,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get company branding settings (public endpoint)."""
     company_id = uuid.UUID(company_id)
@@ -658,6 +986,12 @@ async def get_company_branding(
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
+    etag = make_etag("branding", company.id, company.updated_at)
+    last_modified = last_modified_of(company.updated_at)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    response.headers.update(validator_headers(etag, last_modified))
+    
     return {
         "brand_color": company.brand_color,
         "brand_secondary_color": company.brand_secondary_color,
@@ -687,6 +1021,8 @@ async def update_employee_card_customization(
     if employee.company_id != current_user["company_id"] and current_user["role"] != "superadmin":
         raise HTTPException(status_code=403, detail="Unauthorized")
     
+    cache_key = (employee.company.slug, employee.public_slug)
+    
     # Update customization fields
     for field, value in customization_data.items():
         if hasattr(employee, field):
@@ -695,6 +1031,8 @@ async def update_employee_card_customization(
     db.add(employee)
     await db.commit()
     await db.refresh(employee)
+    await services.refresh_card_snapshot(db, employee_id)
+    invalidate_card(*cache_key)
     
     return employee
 
@@ -702,8 +1040,10 @@ async def update_employee_card_customization(
 @router.get("/analytics/card/{employee_id}")
 async def get_card_analytics(
     employee_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     current_user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get analytics data for an employee's card."""
     employee_id = uuid.UUID(employee_id)
@@ -716,12 +1056,14 @@ async def get_card_analytics(
     if employee.company_id != current_user["company_id"] and current_user["role"] != "superadmin":
         raise HTTPException(status_code=403, detail="Unauthorized")
     
-    # Get analytics
-    analytics = await services.get_employee_analytics(db, employee_id)
+    # Totals come from the daily rollups; only the requested page touches raw events
+    action_counts = await services.get_employee_analytics_summary(db, employee.company_id, employee_id)
+    analytics = await services.get_employee_analytics(db, employee_id, skip, limit)
     
     return {
         "employee_id": str(employee_id),
-        "total_views": len(analytics),
+        "total_views": sum(action_counts.values()),
+        "action_breakdown": action_counts,
         "analytics": [
             {
                 "timestamp": event.timestamp,
@@ -732,40 +1074,3 @@ async def get_card_analytics(
             for event in analytics
         ]
     }
-
-
-@router.get("/analytics/company/{company_id}")
-async def get_company_analytics(
-    company_id: str,
-    current_user=Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-):
-    """Get analytics data for the entire company."""
-    company_id = uuid.UUID(company_id)
-    
-    # Verify authorization
-    if company_id != current_user["company_id"] and current_user["role"] != "superadmin":
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    
-    # Get company analytics
-    analytics = await services.get_company_analytics(db, company_id)
-    
-    # Group by action
-    action_counts = {}
-    for event in analytics:
-        action_counts[event.action] = action_counts.get(event.action, 0) + 1
-    
-    return {
-        "company_id": str(company_id),
-        "total_events": len(analytics),
-        "action_breakdown": action_counts,
-        "recent_events": [
-            {
-                "timestamp": event.timestamp,
-                "action": event.action,
-                "employee_id": str(event.employee_id) if event.employee_id else None,
-            }
-            for event in sorted(analytics, key=lambda x: x.timestamp, reverse=True)[:50]
-        ]
-    }
-
@@ -1,20 +1,33 @@
 import os
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from jose import jwt
 from datetime import datetime, timedelta
 from typing import Optional
 import uuid
 import bcrypt
 
-SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+from cache import token_cache
+from config import settings
+
+SECRET_KEY = settings.secret_key
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# bcrypt work factor; existing hashes at another cost are upgraded on login
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+# Max bcrypt operations running at once; the rest wait for a slot
+BCRYPT_MAX_CONCURRENCY = settings.bcrypt_max_concurrency or os.cpu_count() or 2
+
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
     # Truncate password to 72 bytes if needed (bcrypt limitation)
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt(rounds=12)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -28,6 +41,73 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a bcrypt hash was made with a different work factor than configured."""
+    try:
+        # Format: $2b$<cost>$<salt+hash>
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError, AttributeError):
+        return False
+
+
+# ========== Off-loop Hashing ==========
+# bcrypt releases the GIL, so a small thread pool runs it in parallel without
+# blocking the event loop. The semaphore caps concurrent work and lets us
+# measure how long requests queue for a slot.
+
+_bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_CONCURRENCY, thread_name_prefix="bcrypt")
+_bcrypt_slots = asyncio.Semaphore(BCRYPT_MAX_CONCURRENCY)
+_stats_lock = threading.Lock()
+_hashing_stats = {
+    "operations": 0,
+    "waiting": 0,
+    "total_wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+    "total_run_seconds": 0.0,
+}
+
+
+async def _run_bcrypt(func, *args):
+    queued_at = time.perf_counter()
+    with _stats_lock:
+        _hashing_stats["waiting"] += 1
+    async with _bcrypt_slots:
+        started_at = time.perf_counter()
+        wait = started_at - queued_at
+        with _stats_lock:
+            _hashing_stats["waiting"] -= 1
+            _hashing_stats["total_wait_seconds"] += wait
+            _hashing_stats["max_wait_seconds"] = max(_hashing_stats["max_wait_seconds"], wait)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(_bcrypt_executor, func, *args)
+        finally:
+            with _stats_lock:
+                _hashing_stats["operations"] += 1
+                _hashing_stats["total_run_seconds"] += time.perf_counter() - started_at
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the bcrypt pool without blocking the event loop."""
+    return await _run_bcrypt(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bcrypt pool without blocking the event loop."""
+    return await _run_bcrypt(verify_password, plain_password, hashed_password)
+
+
+def hashing_stats() -> dict:
+    """Report bcrypt pool usage and queue-wait metrics."""
+    with _stats_lock:
+        stats = dict(_hashing_stats)
+    operations = stats["operations"]
+    stats["max_concurrency"] = BCRYPT_MAX_CONCURRENCY
+    stats["rounds"] = BCRYPT_ROUNDS
+    stats["avg_wait_seconds"] = round(stats["total_wait_seconds"] / operations, 6) if operations else 0.0
+    stats["avg_run_seconds"] = round(stats["total_run_seconds"] / operations, 6) if operations else 0.0
+    return stats
+
+
 def create_access_token(
     user_id: uuid.UUID,
     company_id: Optional[uuid.UUID] = None,
@@ -52,13 +132,28 @@ def create_access_token(
 
 
 def decode_token(token: str) -> dict:
-    """Decode and validate a JWT token."""
+    """Decode and validate a JWT token.
+    
+    Verified claims are cached by token digest until the token expires, so
+    repeated requests with the same token skip signature verification.
+    """
+    cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = token_cache.get(cache_key)
+    if claims is not None:
+        return dict(claims)
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except jwt.ExpiredSignatureError:
         raise ValueError("Token has expired")
     except jwt.JWTClaimsError:
         raise ValueError("Invalid token claims")
     except jwt.JWTError:
         raise ValueError("Invalid token")
+    
+    ttl = token_cache.ttl
+    if isinstance(payload.get("exp"), (int, float)):
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(cache_key, dict(payload), ttl=ttl)
+    return payload
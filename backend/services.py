@@ -1,13 +1,24 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from sqlalchemy import select, func, insert, delete, event, case, lambda_stmt, literal, or_, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, contains_eager, load_only, object_session, selectinload
+from collections import Counter
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Any, Dict, List, Optional, Tuple
+import base64
+import json
+import re
 import uuid
 import slugify
+from pydantic import ValidationError
 
 import database_models as db
 import models
-from security import hash_password
+from cache import invalidate_card, invalidate_company_cards, invalidate_company_principals, invalidate_principal
+from config import settings
+from database import AsyncSessionLocal
+from security import hash_password_async
 
 
 # ========== Company Services ==========
@@ -33,7 +44,11 @@ async def create_company(session: AsyncSession, company_data: models.CompanyCrea
 
 async def get_company_by_id(session: AsyncSession, company_id: uuid.UUID) -> Optional[db.Company]:
     """Get a company by ID."""
-    result = await session.execute(select(db.Company).where(db.Company.id == company_id))
+    # Hot lookups use lambda statements: the construct and its cache key are
+    # built once per call site, and company_id is extracted as a bound parameter
+    result = await session.execute(
+        lambda_stmt(lambda: select(db.Company).where(db.Company.id == company_id))
+    )
     return result.scalar_one_or_none()
 
 
@@ -61,6 +76,8 @@ async def update_company(session: AsyncSession, company_id: uuid.UUID, company_d
     session.add(company)
     await session.commit()
     await session.refresh(company)
+    schedule_company_snapshot_refresh(company.id)
+    invalidate_company_cards(company.slug)
     return company
 
 
@@ -78,6 +95,8 @@ async def update_company_branding(session: AsyncSession, company_id: uuid.UUID,
     session.add(company)
     await session.commit()
     await session.refresh(company)
+    schedule_company_snapshot_refresh(company.id)
+    invalidate_company_cards(company.slug)
     return company
 
 
@@ -95,9 +114,7 @@ async def create_employee(
     employee_data: models.EmployeeCreate
 ) -> db.Employee:
     """Create a new employee."""
-    # Generate slug from name
-    base_slug = slugify.slugify(employee_data.full_name)
-    public_slug = f"{base_slug}-{str(uuid.uuid4())[:8]}"
+    public_slug = generate_public_slug(employee_data.full_name)
     
     employee = db.Employee(
         company_id=company_id,
@@ -121,6 +138,95 @@ async def create_employee(
     return employee
 
 
+def generate_public_slug(full_name: str) -> str:
+    """Public card slug: the slugified name plus a short random suffix."""
+    return f"{slugify.slugify(full_name)}-{str(uuid.uuid4())[:8]}"
+
+
+async def _unused_slugs(session: AsyncSession, names: List[str]) -> List[str]:
+    """Generate one public slug per name, unique in the batch and the table."""
+    slugs = [generate_public_slug(name) for name in names]
+    while True:
+        seen = set()
+        taken = set((await session.execute(
+            select(db.Employee.public_slug).where(db.Employee.public_slug.in_(slugs))
+        )).scalars())
+        retry = []
+        for index, slug in enumerate(slugs):
+            if slug in taken or slug in seen:
+                retry.append(index)
+            seen.add(slug)
+        if not retry:
+            return slugs
+        for index in retry:
+            slugs[index] = generate_public_slug(names[index])
+
+
+async def bulk_create_employees(
+    session: AsyncSession,
+    company: db.Company,
+    records: List[Dict[str, Any]],
+    atomic: bool = False,
+    batch_size: int = None,
+) -> dict:
+    """Validate and insert many employees, their cards and card snapshots.
+
+    Rows are validated in one pass; invalid rows are reported (1-based) and
+    skipped, or with atomic=True nothing is inserted if any row fails. Valid
+    rows are written with multi-row INSERTs in one transaction, instead of the
+    per-employee commits and refreshes of `create_employee`.
+    """
+    batch_size = batch_size or settings.bulk_import_batch_size
+    valid, errors = [], []
+    for row_number, record in enumerate(records, start=1):
+        try:
+            valid.append((row_number, models.EmployeeCreate.model_validate(record)))
+        except ValidationError as e:
+            errors.append({
+                "row": row_number,
+                "errors": [f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()],
+            })
+    
+    if not valid or (atomic and errors):
+        return {"created": 0, "failed": len(errors), "employees": [], "errors": errors}
+    
+    now = datetime.utcnow()
+    slugs = await _unused_slugs(session, [data.full_name for _, data in valid])
+    employee_rows, card_rows, snapshot_rows, created = [], [], [], []
+    for (row_number, data), public_slug in zip(valid, slugs):
+        employee = db.Employee(
+            id=uuid.uuid4(),
+            company_id=company.id,
+            full_name=data.full_name,
+            job_title=data.job_title,
+            email=data.email,
+            phone=data.phone,
+            whatsapp=data.whatsapp,
+            photo_url=data.photo_url,
+            bio=data.bio,
+            social_links=data.social_links or {},
+            public_slug=public_slug,
+            custom_fields={},
+            last_updated=now,
+            created_at=now,
+        )
+        urls = build_card_paths(company.slug, public_slug)
+        card = db.Card(id=uuid.uuid4(), employee_id=employee.id, created_at=now, updated_at=now, **urls)
+        
+        employee_rows.append({column.key: getattr(employee, column.key) for column in db.Employee.__table__.columns})
+        card_rows.append({column.key: getattr(card, column.key) for column in db.Card.__table__.columns})
+        snapshot_rows.append(build_card_snapshot(employee, company, card))
+        created.append({"row": row_number, "id": employee.id, "full_name": employee.full_name, "public_slug": public_slug})
+    
+    for start in range(0, len(employee_rows), batch_size):
+        await session.execute(insert(db.Employee), employee_rows[start:start + batch_size])
+        await session.execute(insert(db.Card), card_rows[start:start + batch_size])
+        await upsert_card_snapshots(session, snapshot_rows[start:start + batch_size])
+    await session.commit()
+    
+    return {"created": len(created), "failed": len(errors), "employees": created, "errors": errors}
+
+
 async def get_employee_by_id(session: AsyncSession, employee_id: uuid.UUID) -> Optional[db.Employee]:
     """Get an employee by ID."""
     result = await session.execute(
@@ -141,13 +247,13 @@ async def get_employee_by_slug(
     Returns the ORM `Employee` instance with its `company` relationship loaded
     (so callers can access `employee.company.slug`).
     """
-    result = await session.execute(
-        select(db.Employee)
+    result = await session.execute(lambda_stmt(
+        lambda: select(db.Employee)
         .join(db.Company, db.Employee.company_id == db.Company.id)
         .where(db.Company.slug == company_slug)
         .where(db.Employee.public_slug == employee_slug)
         .options(selectinload(db.Employee.company))
-    )
+    ))
     return result.scalar_one_or_none()
 
 
@@ -157,12 +263,197 @@ async def list_employees(session: AsyncSession, company_id: uuid.UUID, skip: int
         select(db.Employee)
         .where(db.Employee.company_id == company_id)
         .options(selectinload(db.Employee.company))
+        .order_by(db.Employee.created_at, db.Employee.id)
         .offset(skip)
         .limit(limit)
     )
     return result.scalars().all()
 
 
+# Columns of models.EmployeeResponse, with the company slug joined in
+EMPLOYEE_ROW_COLUMNS = (
+    db.Employee.id,
+    db.Employee.company_id,
+    db.Employee.full_name,
+    db.Employee.job_title,
+    db.Employee.email,
+    db.Employee.phone,
+    db.Employee.whatsapp,
+    db.Employee.photo_url,
+    db.Employee.bio,
+    db.Employee.social_links,
+    db.Employee.public_slug,
+    db.Employee.last_updated,
+    db.Company.slug.label("company_slug"),
+)
+
+
+def employee_row(employee: db.Employee) -> dict:
+    """Response row (see models.EmployeeRow) for an ORM employee with its company loaded."""
+    row = {column.key: getattr(employee, column.key) for column in EMPLOYEE_ROW_COLUMNS[:-1]}
+    row["company_slug"] = employee.company.slug if employee.company else None
+    return row
+
+
+async def get_employee_row(session: AsyncSession, employee_id: uuid.UUID) -> Optional[dict]:
+    """Fetch one employee as a response row, without loading ORM entities."""
+    result = await session.execute(
+        select(*EMPLOYEE_ROW_COLUMNS)
+        .join(db.Company, db.Company.id == db.Employee.company_id)
+        .where(db.Employee.id == employee_id)
+    )
+    row = result.first()
+    return row._asdict() if row else None
+
+
+async def list_employee_rows(
+    session: AsyncSession,
+    company_id: uuid.UUID,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[dict]:
+    """Offset page of a company's employees as response rows."""
+    result = await session.execute(
+        select(*EMPLOYEE_ROW_COLUMNS)
+        .join(db.Company, db.Company.id == db.Employee.company_id)
+        .where(db.Employee.company_id == company_id)
+        .order_by(db.Employee.created_at, db.Employee.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [row._asdict() for row in result.all()]
+
+
+def encode_employee_cursor(created_at: datetime, employee_id: uuid.UUID) -> str:
+    """Opaque cursor pointing just after (created_at, employee_id)."""
+    raw = json.dumps([created_at.isoformat(), str(employee_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_employee_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    """Inverse of `encode_employee_cursor`. Raises ValueError if malformed.
+
+    Only naive timestamps are accepted, matching the created_at column.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, employee_id = json.loads(raw)
+        if not isinstance(created_at, str) or not isinstance(employee_id, str):
+            raise ValueError("Cursor fields must be strings")
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is not None:
+            raise ValueError("Cursor timestamp must be naive")
+        return created_at, uuid.UUID(employee_id)
+    except (AttributeError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def list_employees_page(
+    session: AsyncSession,
+    company_id: uuid.UUID,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """One keyset page of a company's employees (response rows) and the next cursor.
+
+    Pages resume after the last (created_at, id) seen, so every page is an
+    index range scan on ix_employees_company_id_created_at_id however deep it
+    is. The next cursor is None on the last page.
+    """
+    stmt = (
+        select(*EMPLOYEE_ROW_COLUMNS, db.Employee.created_at)
+        .join(db.Company, db.Company.id == db.Employee.company_id)
+        .where(db.Employee.company_id == company_id)
+        .order_by(db.Employee.created_at, db.Employee.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, employee_id = decode_employee_cursor(cursor)
+        stmt = stmt.where(tuple_(db.Employee.created_at, db.Employee.id) > tuple_(created_at, employee_id))
+    
+    rows = (await session.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_employee_cursor(rows[-1].created_at, rows[-1].id)
+    
+    page = []
+    for row in rows:
+        item = row._asdict()
+        del item["created_at"]
+        page.append(item)
+    return page, next_cursor
+
+
+# Trigram indexes only narrow a search with at least one full trigram (3 chars);
+# shorter patterns would scan the whole index
+MIN_SEARCH_LENGTH = 3
+
+
+async def search_employees(
+    session: AsyncSession,
+    company_id: uuid.UUID,
+    query: str,
+    limit: int = 20,
+) -> List[dict]:
+    """Ranked prefix and fuzzy search over a company's employees.
+
+    Matches name/title/email prefixes and substrings plus fuzzy name matches
+    (pg_trgm word similarity); every predicate is served by the trigram GIN
+    indexes. Name prefixes rank first, then title or email prefixes, then
+    closeness of the match.
+    """
+    employee = db.Employee
+    term = query.strip().lower()
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    prefix, contains = f"{escaped}%", f"%{escaped}%"
+    
+    name_prefix = employee.full_name.ilike(prefix, escape="\\")
+    other_prefix = or_(employee.job_title.ilike(prefix, escape="\\"), employee.email.ilike(prefix, escape="\\"))
+    score = (
+        case((name_prefix, 2.0), else_=0.0)
+        + case((other_prefix, 1.0), else_=0.0)
+        + func.greatest(
+            func.word_similarity(literal(term), employee.full_name),
+            func.word_similarity(literal(term), func.coalesce(employee.job_title, "")) * 0.5,
+            func.word_similarity(literal(term), func.coalesce(employee.email, "")) * 0.5,
+        )
+    ).label("score")
+    
+    result = await session.execute(
+        select(employee.id, employee.full_name, employee.job_title, employee.email, employee.public_slug, score)
+        .where(employee.company_id == company_id)
+        .where(or_(
+            employee.full_name.ilike(contains, escape="\\"),
+            employee.job_title.ilike(contains, escape="\\"),
+            employee.email.ilike(contains, escape="\\"),
+            employee.full_name.op("%>")(term),  # fuzzy: term <% full_name
+        ))
+        .order_by(score.desc(), employee.full_name, employee.id)
+        .limit(limit)
+    )
+    return [row._asdict() for row in result.all()]
+
+
+async def estimate_employee_count(session: AsyncSession, company_id: uuid.UUID, exact_below: int = 1000) -> int:
+    """Planner estimate of a company's employee count, without a full COUNT(*).
+
+    Small estimates are replaced by an exact count, which is cheap at that size.
+    """
+    plan = await session.scalar(
+        text("EXPLAIN (FORMAT JSON) SELECT 1 FROM employees WHERE company_id = CAST(:company_id AS uuid)"),
+        {"company_id": str(company_id)},
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    if estimate >= exact_below:
+        return estimate
+    return await session.scalar(
+        select(func.count()).select_from(db.Employee).where(db.Employee.company_id == company_id)
+    )
+
+
 async def update_employee(
     session: AsyncSession,
     employee_id: uuid.UUID,
@@ -173,6 +464,8 @@ async def update_employee(
     if not employee:
         return None
     
+    cache_key = (employee.company.slug, employee.public_slug)
+    
     update_data = employee_data.dict(exclude_unset=True)
     for key, value in update_data.items():
         if hasattr(employee, key):
@@ -181,6 +474,8 @@ async def update_employee(
     session.add(employee)
     await session.commit()
     await session.refresh(employee)
+    await refresh_card_snapshot(session, employee_id)
+    invalidate_card(*cache_key)
     return employee
 
 
@@ -193,52 +488,84 @@ async def delete_employee(
     if not employee:
         return False
     
+    cache_key = (employee.company.slug, employee.public_slug)
+    
     # Delete associated card first (foreign key constraint)
     card = await get_card_by_employee(session, employee_id)
     if card:
         await session.delete(card)
     
-    # Delete employee
+    # Raw events cascade with the employee; keep the rollups consistent with them
+    await session.execute(
+        delete(db.AnalyticsDailyRollup).where(db.AnalyticsDailyRollup.employee_id == employee_id)
+    )
+    
+    # Delete employee (its card snapshot goes with it via ON DELETE CASCADE)
     await session.delete(employee)
     await session.commit()
+    invalidate_card(*cache_key)
     return True
 
 
 # ========== Card Services ==========
 
+# scheme://host[:port] of card URLs stored absolute, before they became paths
+_ABSOLUTE_URL_PREFIX = re.compile(r"^[a-z][a-z0-9+.-]*://[^/]*", re.IGNORECASE)
+
+
+def build_card_paths(company_slug: str, employee_slug: str) -> dict:
+    """Host-independent card, QR and vCard paths, as stored in the cards table."""
+    return {
+        # Card URL for viewing the digital card
+        "url": f"/card/{company_slug}/{employee_slug}",
+        # QR code URL - points to the QR endpoint that renders the QR image
+        "qr_code": f"/api/card/{company_slug}/{employee_slug}/qr-vcard",
+        # vCard URL - points to the API endpoint that returns the .vcf file
+        "vcard_url": f"/api/card/{company_slug}/{employee_slug}/vcard",
+    }
+
+
+def resolve_card_urls(values: dict) -> dict:
+    """Copy of `values` with its card URL fields made absolute against the configured bases.
+
+    Legacy absolute URLs have their old host stripped first, so a network
+    change only needs a config change, never a rewrite of stored cards.
+    """
+    bases = {
+        "url": settings.frontend_base_url,
+        "qr_code": settings.api_base_url,
+        "vcard_url": settings.api_base_url,
+    }
+    resolved = dict(values)
+    for key, base in bases.items():
+        if resolved.get(key):
+            resolved[key] = base + _ABSOLUTE_URL_PREFIX.sub("", resolved[key], count=1)
+    return resolved
+
+
+def build_card_urls(company_slug: str, employee_slug: str) -> dict:
+    """Build the public card, QR and vCard URLs for an employee card."""
+    return resolve_card_urls(build_card_paths(company_slug, employee_slug))
+
+
 async def create_card(session: AsyncSession, employee: db.Employee) -> db.Card:
     """Create a digital card for an employee."""
     # Resolve company slug so public URLs use human-friendly slugs (not UUIDs)
     company = await get_company_by_id(session, employee.company_id)
     company_slug = company.slug if company else str(employee.company_id)
 
-    # Use environment variables for URLs - allows dynamic configuration on network changes
-    import os
-    API_HOST = os.getenv("API_HOST", "localhost")
-    API_PORT = os.getenv("API_PORT", "8000")
-    FRONTEND_HOST = os.getenv("FRONTEND_HOST", "localhost")
-    FRONTEND_PORT = os.getenv("FRONTEND_PORT", "3000")
-    ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
-    
-    # Determine protocol based on environment
-    PROTOCOL = "https" if ENVIRONMENT == "production" else "http"
-    
-    # Card URL for viewing the digital card
-    card_url = f"{PROTOCOL}://{FRONTEND_HOST}:{FRONTEND_PORT}/card/{company_slug}/{employee.public_slug}"
-    
-    # QR code URL - points to the new QR endpoint that redirects to the QR image
-    qr_url = f"{PROTOCOL}://{API_HOST}:{API_PORT}/api/card/{company_slug}/{employee.public_slug}/qr-vcard"
-
-    # vCard URL - points to the API endpoint that returns the .vcf file
-    vcard_url = f"{PROTOCOL}://{API_HOST}:{API_PORT}/api/card/{company_slug}/{employee.public_slug}/vcard"
+    urls = build_card_paths(company_slug, employee.public_slug)
     
     card = db.Card(
         employee_id=employee.id,
-        url=card_url,
-        qr_code=qr_url,
-        vcard_url=vcard_url,
+        url=urls["url"],
+        qr_code=urls["qr_code"],
+        vcard_url=urls["vcard_url"],
     )
     session.add(card)
+    await session.flush()
+    if company:
+        await upsert_card_snapshots(session, [build_card_snapshot(employee, company, card)])
     await session.commit()
     await session.refresh(card)
     return card
@@ -246,14 +573,319 @@ async def create_card(session: AsyncSession, employee: db.Employee) -> db.Card:
 
 async def get_card_by_employee(session: AsyncSession, employee_id: uuid.UUID) -> Optional[db.Card]:
     """Get a card for an employee."""
-    result = await session.execute(
-        select(db.Card)
+    result = await session.execute(lambda_stmt(
+        lambda: select(db.Card)
         .options(selectinload(db.Card.employee))
         .where(db.Card.employee_id == employee_id)
-    )
+    ))
     return result.scalar_one_or_none()
 
 
+# ========== Card Snapshot Services ==========
+
+def build_card_snapshot(employee: db.Employee, company: db.Company, card: Optional[db.Card]) -> dict:
+    """Assemble the card_snapshots row for an employee's public card."""
+    payload = models.BusinessCardResponse(
+        employee_id=employee.id,
+        employee_name=employee.full_name,
+        company_name=company.name,
+        company_id=company.id,
+        job_title=employee.job_title,
+        email=employee.email,
+        phone=employee.phone,
+        whatsapp=employee.whatsapp,
+        bio=employee.bio,
+        photo_url=employee.photo_url,
+        social_links=employee.social_links,
+        qr_code=card.qr_code if card else None,
+        vcard_url=card.vcard_url if card else None,
+        company_logo=company.logo_url,
+        company_brand_color=company.brand_color,
+    )
+    return {
+        "company_slug": company.slug,
+        "employee_slug": employee.public_slug,
+        "employee_id": employee.id,
+        "company_id": company.id,
+        "payload": payload.model_dump(mode="json"),
+        "employee_updated_at": employee.last_updated,
+        "company_updated_at": company.updated_at,
+    }
+
+
+async def upsert_card_snapshots(session: AsyncSession, rows: List[dict]) -> None:
+    """Insert or replace card snapshot rows (caller commits).
+
+    Snapshots are keyed by slug pair but unique per employee, so an
+    employee's snapshot under a previous slug (company or employee slug
+    changed) is removed first.
+    """
+    if not rows:
+        return
+    await session.execute(
+        delete(db.CardSnapshot).where(
+            db.CardSnapshot.employee_id.in_([row["employee_id"] for row in rows]),
+            tuple_(db.CardSnapshot.company_slug, db.CardSnapshot.employee_slug).not_in(
+                [(row["company_slug"], row["employee_slug"]) for row in rows]
+            ),
+        )
+    )
+    stmt = pg_insert(db.CardSnapshot).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[db.CardSnapshot.company_slug, db.CardSnapshot.employee_slug],
+        set_={
+            "employee_id": stmt.excluded.employee_id,
+            "company_id": stmt.excluded.company_id,
+            "payload": stmt.excluded.payload,
+            "employee_updated_at": stmt.excluded.employee_updated_at,
+            "company_updated_at": stmt.excluded.company_updated_at,
+            "refreshed_at": func.now(),
+        },
+    )
+    await session.execute(stmt)
+
+
+# Columns a public card is built from (see build_card_snapshot). Everything
+# else, e.g. custom_fields or the company's custom_css, is never fetched.
+CARD_EMPLOYEE_COLUMNS = (
+    db.Employee.id,
+    db.Employee.company_id,
+    db.Employee.full_name,
+    db.Employee.job_title,
+    db.Employee.email,
+    db.Employee.phone,
+    db.Employee.whatsapp,
+    db.Employee.photo_url,
+    db.Employee.bio,
+    db.Employee.social_links,
+    db.Employee.public_slug,
+    db.Employee.last_updated,
+)
+CARD_COMPANY_COLUMNS = (
+    db.Company.id,
+    db.Company.name,
+    db.Company.slug,
+    db.Company.logo_url,
+    db.Company.brand_color,
+    db.Company.updated_at,
+)
+CARD_COLUMNS = (db.Card.id, db.Card.qr_code, db.Card.vcard_url)
+
+
+async def load_card_source(session: AsyncSession, *criteria) -> Optional[tuple]:
+    """Load the (employee, card) a public card is built from, in one query.
+
+    Only card columns are fetched; the company comes from the same join.
+    """
+    result = await session.execute(
+        select(db.Employee, db.Card)
+        .join(db.Employee.company)
+        .outerjoin(db.Card, db.Card.employee_id == db.Employee.id)
+        .where(*criteria)
+        .options(
+            load_only(*CARD_EMPLOYEE_COLUMNS),
+            contains_eager(db.Employee.company).load_only(*CARD_COMPANY_COLUMNS),
+            load_only(*CARD_COLUMNS),
+        )
+        .limit(1)
+    )
+    return result.first()
+
+
+async def get_card_ids(session: AsyncSession, company_slug: str, employee_slug: str):
+    """Resolve a public card to its (company_id, employee_id) and nothing else.
+
+    Enough for analytics tracking and QR rendering; the card payload is
+    never read.
+    """
+    result = await session.execute(lambda_stmt(
+        lambda: select(db.CardSnapshot.company_id, db.CardSnapshot.employee_id)
+        .where(db.CardSnapshot.company_slug == company_slug)
+        .where(db.CardSnapshot.employee_slug == employee_slug)
+    ))
+    row = result.first()
+    if row:
+        return row
+    
+    # Cards not yet snapshotted
+    result = await session.execute(lambda_stmt(
+        lambda: select(db.Employee.company_id, db.Employee.id.label("employee_id"))
+        .join(db.Company, db.Employee.company_id == db.Company.id)
+        .where(db.Company.slug == company_slug)
+        .where(db.Employee.public_slug == employee_slug)
+    ))
+    return result.first()
+
+
+async def refresh_card_snapshot(
+    session: AsyncSession,
+    employee_id: uuid.UUID,
+    persist: bool = True
+) -> Optional[db.CardSnapshot]:
+    """Rebuild the public card snapshot for one employee.
+
+    With persist=False the snapshot is only built, not written (read-only
+    sessions such as the replica).
+    """
+    source = await load_card_source(session, db.Employee.id == employee_id)
+    return await _store_card_snapshot(session, source, persist)
+
+
+async def _store_card_snapshot(session: AsyncSession, source: Optional[tuple], persist: bool) -> Optional[db.CardSnapshot]:
+    if not source:
+        return None
+    
+    employee, card = source
+    row = build_card_snapshot(employee, employee.company, card)
+    if persist:
+        await upsert_card_snapshots(session, [row])
+        await session.commit()
+    return db.CardSnapshot(**row)
+
+
+async def refresh_company_snapshots(session: AsyncSession, company: db.Company, batch_size: int = 500) -> int:
+    """Rebuild the card snapshots of every employee in a company.
+
+    Employees are walked in primary-key batches, each committed on its own,
+    so large companies are never loaded into memory or locked at once.
+    Request handlers use `schedule_company_snapshot_refresh` instead.
+    """
+    refreshed = 0
+    last_id = None
+    while True:
+        stmt = (
+            select(db.Employee, db.Card)
+            .outerjoin(db.Card, db.Card.employee_id == db.Employee.id)
+            .where(db.Employee.company_id == company.id)
+            .options(load_only(*CARD_EMPLOYEE_COLUMNS), load_only(*CARD_COLUMNS))
+            .order_by(db.Employee.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            stmt = stmt.where(db.Employee.id > last_id)
+        batch = (await session.execute(stmt)).all()
+        if not batch:
+            break
+        
+        await upsert_card_snapshots(
+            session,
+            [build_card_snapshot(employee, company, card) for employee, card in batch],
+        )
+        await session.commit()
+        refreshed += len(batch)
+        last_id = batch[-1][0].id
+    
+    return refreshed
+
+
+# Background company refreshes: one task per company, re-run if scheduled again meanwhile
+_company_refresh_tasks: Dict[uuid.UUID, asyncio.Task] = {}
+_company_refresh_pending: set = set()
+
+
+def schedule_company_snapshot_refresh(company_id: uuid.UUID) -> None:
+    """Rebuild a company's card snapshots in the background, outside the request.
+
+    Public cards keep serving the previous snapshots until each batch lands.
+    """
+    if company_id in _company_refresh_tasks:
+        _company_refresh_pending.add(company_id)
+        return
+    _company_refresh_tasks[company_id] = asyncio.create_task(_run_company_snapshot_refresh(company_id))
+
+
+async def _run_company_snapshot_refresh(company_id: uuid.UUID) -> None:
+    try:
+        while True:
+            _company_refresh_pending.discard(company_id)
+            try:
+                async with AsyncSessionLocal() as session:
+                    company = await get_company_by_id(session, company_id)
+                    if company:
+                        await refresh_company_snapshots(session, company)
+                        invalidate_company_cards(company.slug)
+            except Exception as e:
+                print(f"❌ Failed to refresh card snapshots for company {company_id}: {e}")
+            if company_id not in _company_refresh_pending:
+                return
+    finally:
+        del _company_refresh_tasks[company_id]
+
+
+async def wait_for_snapshot_refreshes() -> None:
+    """Let in-flight company refreshes finish (called on shutdown)."""
+    while _company_refresh_tasks:
+        await asyncio.gather(*_company_refresh_tasks.values(), return_exceptions=True)
+
+
+async def get_card_snapshot(
+    session: AsyncSession,
+    company_slug: str,
+    employee_slug: str,
+    persist: bool = True
+) -> Optional[db.CardSnapshot]:
+    """Resolve a public card by slug pair with a single primary-key lookup.
+
+    Cards created before the read model existed are built from the source
+    tables on first access, and persisted unless persist=False.
+    """
+    snapshot = await session.get(db.CardSnapshot, (company_slug, employee_slug))
+    if snapshot:
+        return snapshot
+    
+    source = await load_card_source(
+        session,
+        db.Company.slug == company_slug,
+        db.Employee.public_slug == employee_slug,
+    )
+    return await _store_card_snapshot(session, source, persist)
+
+
+async def count_card_snapshots(session: AsyncSession, company_slug: str) -> int:
+    """Count the published cards of a company."""
+    result = await session.execute(
+        select(func.count())
+        .select_from(db.CardSnapshot)
+        .where(db.CardSnapshot.company_slug == company_slug)
+    )
+    return result.scalar_one()
+
+
+async def iter_card_snapshot_batches(
+    session: AsyncSession,
+    company_slug: str,
+    batch_size: int = 200
+) -> AsyncIterator[List[dict]]:
+    """Yield a company's cards in slug order, one keyset page at a time.
+
+    Each item holds the employee slug, the card payload and the vCard URL that
+    the card's QR code encodes.
+    """
+    last_slug = None
+    while True:
+        stmt = (
+            select(db.CardSnapshot.employee_slug, db.CardSnapshot.payload)
+            .where(db.CardSnapshot.company_slug == company_slug)
+            .order_by(db.CardSnapshot.employee_slug)
+            .limit(batch_size)
+        )
+        if last_slug is not None:
+            stmt = stmt.where(db.CardSnapshot.employee_slug > last_slug)
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return
+        
+        yield [
+            {
+                "employee_slug": employee_slug,
+                "payload": payload,
+                "vcard_url": build_card_urls(company_slug, employee_slug)["vcard_url"],
+            }
+            for employee_slug, payload in rows
+        ]
+        last_slug = rows[-1].employee_slug
+
+
 # ========== User Services ==========
 
 async def create_user(
@@ -265,7 +897,7 @@ async def create_user(
     user = db.User(
         company_id=company_id,
         email=user_data.email,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         full_name=user_data.full_name,
         role=getattr(user_data, 'role', 'admin'),
         is_active=True,
@@ -286,18 +918,134 @@ async def get_user_by_email(session: AsyncSession, email: str) -> Optional[db.Us
     return result.scalar_one_or_none()
 
 
+# Cached principals are evicted once the change is committed; evicting at
+# flush time would let a concurrent request re-cache the old row
+@event.listens_for(db.User, "after_update")
+@event.listens_for(db.User, "after_delete")
+def _queue_principal_eviction(mapper, connection, target):
+    """Any user row change (password, role, deactivation, deletion) evicts the cached principal."""
+    object_session(target).info.setdefault("evict_principals", set()).add(target.id)
+
+
+@event.listens_for(db.Company, "after_delete")
+def _queue_company_principal_eviction(mapper, connection, target):
+    """Users removed with their company (ON DELETE CASCADE) are evicted too."""
+    object_session(target).info.setdefault("evict_company_principals", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_principals(session):
+    for user_id in session.info.pop("evict_principals", ()):
+        invalidate_principal(user_id)
+    for company_id in session.info.pop("evict_company_principals", ()):
+        invalidate_company_principals(company_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_principal_evictions(session):
+    session.info.pop("evict_principals", None)
+    session.info.pop("evict_company_principals", None)
+
+
 async def get_user_by_id(session: AsyncSession, user_id: uuid.UUID) -> Optional[db.User]:
     """Get a user by ID."""
-    result = await session.execute(
-        select(db.User)
+    result = await session.execute(lambda_stmt(
+        lambda: select(db.User)
         .options(selectinload(db.User.company))
         .where(db.User.id == user_id)
-    )
+    ))
     return result.scalar_one_or_none()
 
 
 # ========== Analytics Services ==========
 
+def build_event_row(
+    company_id: uuid.UUID,
+    event_data: models.AnalyticsEventCreate,
+    employee_id: Optional[uuid.UUID] = None,
+) -> dict:
+    """Build an analytics row with its id and timestamp assigned up front.
+
+    Lets events be acknowledged before they are written (see analytics_queue).
+    """
+    return {
+        "id": uuid.uuid4(),
+        "company_id": company_id,
+        "employee_id": employee_id,
+        "timestamp": datetime.utcnow(),
+        "device": event_data.device,
+        "region": event_data.region,
+        "action": event_data.action,
+        "ip_address": getattr(event_data, 'ip_address', None),
+    }
+
+
+# Rollup key for events that are not tied to an employee
+NO_EMPLOYEE = uuid.UUID(int=0)
+
+
+def retention_days_for_plans(plans) -> int:
+    """Analytics retention window for a company with these active plans.
+
+    The longest window among them applies; no plan, or an unknown one, gets
+    the longest configured window.
+    """
+    windows = settings.analytics_retention_days
+    longest = max(windows.values())
+    return max((windows.get(plan, longest) for plan in plans), default=longest)
+
+
+async def get_company_retention_days(session: AsyncSession, company_ids) -> Dict[uuid.UUID, int]:
+    """Current analytics retention window (days) of each company."""
+    result = await session.execute(
+        select(db.Subscription.company_id, db.Subscription.plan).where(
+            db.Subscription.company_id.in_(company_ids),
+            db.Subscription.active.is_(True),
+        )
+    )
+    plans: Dict[uuid.UUID, List[str]] = {company_id: [] for company_id in company_ids}
+    for company_id, plan in result.all():
+        plans[company_id].append(plan)
+    return {company_id: retention_days_for_plans(company_plans) for company_id, company_plans in plans.items()}
+
+
+async def insert_events(session: AsyncSession, rows: List[dict]) -> None:
+    """Write a batch of analytics rows and bump their rollups (caller commits).
+
+    Each row is stamped with its company's retention window, which picks the
+    partition tier it is stored (and eventually dropped) in.
+    """
+    if not rows:
+        return
+    windows = await get_company_retention_days(session, {row["company_id"] for row in rows})
+    for row in rows:
+        row["retention_days"] = windows[row["company_id"]]
+    await session.execute(insert(db.AnalyticsEvent), rows)
+    await increment_rollups(session, rows)
+
+
+async def increment_rollups(session: AsyncSession, rows: List[dict]) -> None:
+    """Add a batch of events to the per-day analytics rollup counters."""
+    counts = Counter(
+        (row["company_id"], row["employee_id"] or NO_EMPLOYEE, row["timestamp"].date(), row["action"])
+        for row in rows
+    )
+    # Upsert in key order so concurrent flushers lock rows in the same order
+    values = [
+        {"company_id": company_id, "employee_id": employee_id, "day": day, "action": action, "count": count}
+        for (company_id, employee_id, day, action), count in sorted(counts.items(), key=lambda item: tuple(map(str, item[0])))
+    ]
+    stmt = pg_insert(db.AnalyticsDailyRollup).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            db.AnalyticsDailyRollup.company_id,
+            db.AnalyticsDailyRollup.employee_id,
+            db.AnalyticsDailyRollup.day,
+            db.AnalyticsDailyRollup.action,
+        ],
+        set_={"count": db.AnalyticsDailyRollup.count + stmt.excluded.count},
+    )
+    await session.execute(stmt)
 
 
 async def track_event(
@@ -305,55 +1053,119 @@ async def track_event(
     company_id: uuid.UUID,
     event_data: models.AnalyticsEventCreate,
     employee_id: Optional[uuid.UUID] = None,
-) -> db.AnalyticsEvent:
-    """Track an analytics event."""
-    from datetime import datetime
-    
-    event = db.AnalyticsEvent(
-        company_id=company_id,
-        employee_id=employee_id,
-        timestamp=datetime.utcnow(),
-        device=event_data.device,
-        region=event_data.region,
-        action=event_data.action,
-        ip_address=getattr(event_data, 'ip_address', None),
-    )
-    session.add(event)
+) -> uuid.UUID:
+    """Track an analytics event synchronously (durable before returning).
+
+    Public endpoints use the write-behind `analytics_queue.analytics_writer`
+    instead, so request latency does not include the write.
+    """
+    row = build_event_row(company_id, event_data, employee_id)
+    await insert_events(session, [row])
     await session.commit()
-    await session.refresh(event)
-    return event
+    return row["id"]
 
 
 async def get_analytics_by_company(
     session: AsyncSession,
-    company_id: uuid.UUID
+    company_id: uuid.UUID,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
 ) -> List[db.AnalyticsEvent]:
-    """Get all analytics events for a company."""
+    """Get analytics events for a company, newest first.
+
+    A `start`/`end` range (end exclusive) limits the scan to the monthly
+    partitions it overlaps.
+    """
+    stmt = select(db.AnalyticsEvent).where(db.AnalyticsEvent.company_id == company_id)
+    if start:
+        stmt = stmt.where(db.AnalyticsEvent.timestamp >= start)
+    if end:
+        stmt = stmt.where(db.AnalyticsEvent.timestamp < end)
     result = await session.execute(
-        select(db.AnalyticsEvent)
-        .where(db.AnalyticsEvent.company_id == company_id)
-        .order_by(db.AnalyticsEvent.timestamp.desc())
+        stmt.order_by(db.AnalyticsEvent.timestamp.desc())
+        .offset(skip)
+        .limit(limit)
     )
     return result.scalars().all()
 
 
 async def get_analytics_by_employee(
     session: AsyncSession,
-    employee_id: uuid.UUID
+    employee_id: uuid.UUID,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
 ) -> List[db.AnalyticsEvent]:
-    """Get all analytics events for an employee."""
+    """Get analytics events for an employee, newest first.
+
+    A `start`/`end` range (end exclusive) limits the scan to the monthly
+    partitions it overlaps.
+    """
+    stmt = select(db.AnalyticsEvent).where(db.AnalyticsEvent.employee_id == employee_id)
+    if start:
+        stmt = stmt.where(db.AnalyticsEvent.timestamp >= start)
+    if end:
+        stmt = stmt.where(db.AnalyticsEvent.timestamp < end)
     result = await session.execute(
-        select(db.AnalyticsEvent)
-        .where(db.AnalyticsEvent.employee_id == employee_id)
-        .order_by(db.AnalyticsEvent.timestamp.desc())
+        stmt.order_by(db.AnalyticsEvent.timestamp.desc())
+        .offset(skip)
+        .limit(limit)
     )
     return result.scalars().all()
 
 
+async def iter_analytics_events(
+    session: AsyncSession,
+    company_id: uuid.UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    action: Optional[str] = None,
+    employee_id: Optional[uuid.UUID] = None,
+    page_size: int = 1000,
+) -> AsyncIterator[list]:
+    """Yield a company's events in (timestamp, id) order, one keyset page at a time.
+
+    Each page resumes after the last (timestamp, id) seen, so every query is a
+    short index range scan and memory stays bounded by `page_size` no matter
+    how much history the company has. Only export columns are fetched.
+    """
+    event = db.AnalyticsEvent
+    filters = [event.company_id == company_id]
+    if start:
+        filters.append(event.timestamp >= start)
+    if end:
+        filters.append(event.timestamp < end)
+    if action:
+        filters.append(event.action == action)
+    if employee_id:
+        filters.append(event.employee_id == employee_id)
+    
+    last = None
+    while True:
+        stmt = (
+            select(event.id, event.timestamp, event.employee_id, event.action, event.device, event.region)
+            .where(*filters)
+            .order_by(event.timestamp, event.id)
+            .limit(page_size)
+        )
+        if last is not None:
+            stmt = stmt.where(tuple_(event.timestamp, event.id) > tuple_(last.timestamp, last.id))
+        rows = (await session.execute(stmt)).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1]
+
+
 # Aliases for new CMS endpoints
-async def get_employee_analytics(session: AsyncSession, employee_id: uuid.UUID) -> List[db.AnalyticsEvent]:
+async def get_employee_analytics(
+    session: AsyncSession, employee_id: uuid.UUID, skip: int = 0, limit: Optional[int] = None
+) -> List[db.AnalyticsEvent]:
     """Get analytics for an employee card."""
-    return await get_analytics_by_employee(session, employee_id)
+    return await get_analytics_by_employee(session, employee_id, skip, limit)
 
 
 async def get_company_analytics(session: AsyncSession, company_id: uuid.UUID) -> List[db.AnalyticsEvent]:
@@ -362,19 +1174,37 @@ async def get_company_analytics(session: AsyncSession, company_id: uuid.UUID) ->
 
 
 async def get_analytics_summary(session: AsyncSession, company_id: uuid.UUID) -> dict:
-    """Get analytics summary for a company."""
+    """Get per-action event counts for a company (read from the daily rollups)."""
     result = await session.execute(
         select(
-            db.AnalyticsEvent.action,
-            func.count(db.AnalyticsEvent.id).label('count')
+            db.AnalyticsDailyRollup.action,
+            func.sum(db.AnalyticsDailyRollup.count).label('count')
         )
-        .where(db.AnalyticsEvent.company_id == company_id)
-        .group_by(db.AnalyticsEvent.action)
+        .where(db.AnalyticsDailyRollup.company_id == company_id)
+        .group_by(db.AnalyticsDailyRollup.action)
     )
     
     summary = {}
     for action, count in result.all():
-        summary[action] = count
+        summary[action] = int(count)
     
     return summary
 
+
+async def get_employee_analytics_summary(
+    session: AsyncSession, company_id: uuid.UUID, employee_id: uuid.UUID
+) -> dict:
+    """Get per-action event counts for one employee (read from the daily rollups)."""
+    result = await session.execute(
+        select(
+            db.AnalyticsDailyRollup.action,
+            func.sum(db.AnalyticsDailyRollup.count).label('count')
+        )
+        .where(
+            db.AnalyticsDailyRollup.company_id == company_id,
+            db.AnalyticsDailyRollup.employee_id == employee_id,
+        )
+        .group_by(db.AnalyticsDailyRollup.action)
+    )
+    return {action: int(count) for action, count in result.all()}
+
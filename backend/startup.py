@@ -0,0 +1,48 @@
+"""Startup timing: where a worker's cold start goes.
+
+main.py records each phase (imports, engine creation, first connection,
+migrations, background tasks); the breakdown is printed once the app is
+ready and served at /api/health/startup.
+"""
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StartupReport:
+    """Ordered phase durations for one process start."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.mode: Optional[str] = None
+        self.schema_version: Optional[int] = None
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def as_dict(self) -> dict:
+        return {
+            "mode": self.mode,
+            "schema_version": self.schema_version,
+            "total_ms": round(self.total * 1000, 1),
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases.items()},
+        }
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{name} {seconds * 1000:.0f}" for name, seconds in self.phases.items())
+        return f"⏱️  Started in {self.total * 1000:.0f} ms ({parts})"
+
+
+startup_report = StartupReport()
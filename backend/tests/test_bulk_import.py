@@ -0,0 +1,48 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from routes import _parse_bulk_records
+
+
+def test_parse_json_array():
+    body = json.dumps([{"full_name": "Jo Doe", "email": "jo@acme.example"}]).encode()
+
+    assert _parse_bulk_records(body, "application/json") == [{"full_name": "Jo Doe", "email": "jo@acme.example"}]
+
+
+@pytest.mark.parametrize("body", [b"{not json", b'{"full_name": "Jo"}'])
+def test_parse_json_rejects_non_arrays(body):
+    with pytest.raises(HTTPException) as error:
+        _parse_bulk_records(body, "application/json")
+    assert error.value.status_code == 400
+
+
+def test_parse_csv_trims_and_blanks_to_none():
+    body = "﻿full_name, job_title ,email\n Jo Doe ,,jo@acme.example\n".encode("utf-8")
+
+    assert _parse_bulk_records(body, "text/csv") == [
+        {"full_name": "Jo Doe", "job_title": None, "email": "jo@acme.example"},
+    ]
+
+
+def test_parse_csv_decodes_social_links():
+    body = b'full_name,social_links\nJo,"{""linkedin"": ""https://linkedin.com/in/jo""}"\nSam,not-json\n'
+
+    jo, sam = _parse_bulk_records(body, "text/csv; charset=utf-8")
+    assert jo["social_links"] == {"linkedin": "https://linkedin.com/in/jo"}
+    # Left as-is for row validation to report
+    assert sam["social_links"] == "not-json"
+
+
+def test_parse_csv_short_rows_omit_missing_cells():
+    body = b"full_name,email\nJo\n"
+
+    assert _parse_bulk_records(body, "text/csv") == [{"full_name": "Jo"}]
+
+
+def test_parse_csv_rejects_non_utf8():
+    with pytest.raises(HTTPException) as error:
+        _parse_bulk_records("full_name\nJosé\n".encode("latin-1"), "text/csv")
+    assert error.value.status_code == 400
@@ -0,0 +1,143 @@
+import pytest
+
+import cache
+from cache import ByteBudgetLRUCache, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+# ========== TTLCache ==========
+
+def test_ttl_cache_returns_stored_value(clock):
+    ttl_cache = TTLCache(maxsize=4, ttl=10)
+    ttl_cache.set("a", 1)
+
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("missing") is None
+    assert ttl_cache.stats()["hits"] == 1
+    assert ttl_cache.stats()["misses"] == 1
+
+
+def test_ttl_cache_expires_entries(clock):
+    ttl_cache = TTLCache(maxsize=4, ttl=10)
+    ttl_cache.set("a", 1)
+
+    clock.now += 9.9
+    assert ttl_cache.get("a") == 1
+    clock.now += 0.1
+    assert ttl_cache.get("a") is None
+    assert len(ttl_cache) == 0
+    assert ttl_cache.stats()["expirations"] == 1
+
+
+def test_ttl_cache_per_entry_ttl_overrides_default(clock):
+    ttl_cache = TTLCache(maxsize=4, ttl=10)
+    ttl_cache.set("short", 1, ttl=1)
+    ttl_cache.set("long", 2)
+
+    clock.now += 5
+    assert ttl_cache.get("short") is None
+    assert ttl_cache.get("long") == 2
+
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    ttl_cache = TTLCache(maxsize=2, ttl=10)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")  # "b" is now the least recently used
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("c") == 3
+    assert ttl_cache.stats()["evictions"] == 1
+
+
+def test_ttl_cache_pop_and_invalidate_where(clock):
+    ttl_cache = TTLCache(maxsize=8, ttl=10)
+    ttl_cache.set(("acme", "jo"), 1)
+    ttl_cache.set(("acme", "sam"), 2)
+    ttl_cache.set(("globex", "jo"), 3)
+
+    ttl_cache.pop(("acme", "jo"))
+    ttl_cache.pop(("acme", "missing"))
+    assert ttl_cache.invalidate_where(lambda key: key[0] == "acme") == 1
+    assert len(ttl_cache) == 1
+    assert ttl_cache.get(("globex", "jo")) == 3
+
+
+def test_ttl_cache_invalidate_values_where(clock):
+    ttl_cache = TTLCache(maxsize=8, ttl=10)
+    ttl_cache.set(1, {"company": "acme"})
+    ttl_cache.set(2, {"company": "globex"})
+
+    assert ttl_cache.invalidate_values_where(lambda value: value["company"] == "acme") == 1
+    assert ttl_cache.get(1) is None
+    assert ttl_cache.get(2) == {"company": "globex"}
+
+
+# ========== ByteBudgetLRUCache ==========
+
+def test_byte_budget_cache_tracks_size():
+    byte_cache = ByteBudgetLRUCache(max_bytes=100)
+    byte_cache.set(("a", 1), b"x" * 10)
+
+    assert byte_cache.get(("a", 1)) == b"x" * 10
+    assert byte_cache.current_bytes == 10
+
+
+def test_byte_budget_cache_new_version_replaces_old():
+    byte_cache = ByteBudgetLRUCache(max_bytes=100)
+    byte_cache.set(("a", 1), b"old")
+    byte_cache.set(("a", 2), b"newer")
+
+    assert byte_cache.get(("a", 1)) is None
+    assert byte_cache.get(("a", 2)) == b"newer"
+    assert byte_cache.current_bytes == 5
+    assert len(byte_cache) == 1
+
+
+def test_byte_budget_cache_evicts_lru_past_budget():
+    byte_cache = ByteBudgetLRUCache(max_bytes=25)
+    byte_cache.set(("a", 1), b"x" * 10)
+    byte_cache.set(("b", 1), b"x" * 10)
+    byte_cache.get(("a", 1))  # "b" is now the least recently used
+    byte_cache.set(("c", 1), b"x" * 10)
+
+    assert byte_cache.get(("b", 1)) is None
+    assert byte_cache.get(("a", 1)) is not None
+    assert byte_cache.get(("c", 1)) is not None
+    assert byte_cache.current_bytes == 20
+    assert byte_cache.stats()["evictions"] == 1
+
+
+def test_byte_budget_cache_skips_oversized_values():
+    byte_cache = ByteBudgetLRUCache(max_bytes=5)
+    byte_cache.set(("a", 1), b"x" * 6)
+
+    assert byte_cache.get(("a", 1)) is None
+    assert byte_cache.current_bytes == 0
+
+
+def test_byte_budget_cache_custom_sizeof_and_clear():
+    byte_cache = ByteBudgetLRUCache(max_bytes=100, sizeof=lambda value: len(value["body"]))
+    byte_cache.set(("a", 1), {"body": b"x" * 30})
+    assert byte_cache.current_bytes == 30
+
+    byte_cache.clear()
+    assert len(byte_cache) == 0
+    assert byte_cache.current_bytes == 0
+    assert byte_cache.get(("a", 1)) is None
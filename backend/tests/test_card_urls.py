@@ -0,0 +1,48 @@
+import pytest
+
+import services
+from config import settings
+
+
+@pytest.fixture(autouse=True)
+def bases(monkeypatch):
+    monkeypatch.setattr(settings, "api_base_url", "https://api.example.com")
+    monkeypatch.setattr(settings, "frontend_base_url", "https://cards.example.com")
+
+
+def test_card_paths_are_host_independent():
+    assert services.build_card_paths("acme", "jo") == {
+        "url": "/card/acme/jo",
+        "qr_code": "/api/card/acme/jo/qr-vcard",
+        "vcard_url": "/api/card/acme/jo/vcard",
+    }
+
+
+def test_card_urls_resolve_against_configured_bases():
+    assert services.build_card_urls("acme", "jo") == {
+        "url": "https://cards.example.com/card/acme/jo",
+        "qr_code": "https://api.example.com/api/card/acme/jo/qr-vcard",
+        "vcard_url": "https://api.example.com/api/card/acme/jo/vcard",
+    }
+
+
+def test_legacy_absolute_urls_are_rebased():
+    resolved = services.resolve_card_urls({
+        "url": "http://192.168.1.5:3000/card/acme/jo",
+        "qr_code": "HTTP://old-host/api/card/acme/jo/qr-vcard?size=256",
+        "vcard_url": "http://192.168.1.5:8000/api/card/acme/jo/vcard",
+    })
+
+    assert resolved == {
+        "url": "https://cards.example.com/card/acme/jo",
+        "qr_code": "https://api.example.com/api/card/acme/jo/qr-vcard?size=256",
+        "vcard_url": "https://api.example.com/api/card/acme/jo/vcard",
+    }
+
+
+def test_missing_urls_and_other_fields_are_left_alone():
+    payload = {"employee_name": "Jo", "qr_code": None, "vcard_url": ""}
+
+    resolved = services.resolve_card_urls(payload)
+    assert resolved == payload
+    assert resolved is not payload
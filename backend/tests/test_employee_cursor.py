@@ -0,0 +1,36 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+
+from services import decode_employee_cursor, encode_employee_cursor
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 1, 1, 12, 30, 15, 123456)
+    employee_id = uuid.uuid4()
+
+    cursor = encode_employee_cursor(created_at, employee_id)
+    assert "=" not in cursor
+    assert decode_employee_cursor(cursor) == (created_at, employee_id)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor("just a string"),
+    raw_cursor(["2026-01-01"]),
+    raw_cursor(["2026-01-01", 5]),
+    raw_cursor([20260101, str(uuid.uuid4())]),
+    raw_cursor(["yesterday", str(uuid.uuid4())]),
+    raw_cursor(["2026-01-01", "not-a-uuid"]),
+    raw_cursor(["2026-01-01T00:00:00+00:00", str(uuid.uuid4())]),
+])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_employee_cursor(cursor)
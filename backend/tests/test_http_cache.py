@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from http_cache import is_not_modified, last_modified_of, make_etag
+
+ETAG = make_etag("card", "acme", "jo", 1)
+LAST_MODIFIED = datetime(2026, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def make_request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+def test_no_conditional_headers():
+    assert not is_not_modified(make_request(), ETAG, LAST_MODIFIED)
+
+
+def test_if_none_match_exact_weak_list_and_wildcard():
+    assert is_not_modified(make_request(if_none_match=ETAG), ETAG, None)
+    assert is_not_modified(make_request(if_none_match=f"W/{ETAG}"), ETAG, None)
+    assert is_not_modified(make_request(if_none_match=f'"other", {ETAG}'), ETAG, None)
+    assert is_not_modified(make_request(if_none_match="*"), ETAG, None)
+    assert not is_not_modified(make_request(if_none_match='"other"'), ETAG, None)
+
+
+def test_if_modified_since():
+    assert is_not_modified(make_request(if_modified_since="Thu, 01 Jan 2026 12:00:00 GMT"), ETAG, LAST_MODIFIED)
+    assert is_not_modified(make_request(if_modified_since="Fri, 02 Jan 2026 00:00:00 GMT"), ETAG, LAST_MODIFIED)
+    assert not is_not_modified(make_request(if_modified_since="Thu, 01 Jan 2026 11:59:59 GMT"), ETAG, LAST_MODIFIED)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    request = make_request(if_none_match='"other"', if_modified_since="Fri, 02 Jan 2026 00:00:00 GMT")
+    assert not is_not_modified(request, ETAG, LAST_MODIFIED)
+
+
+def test_malformed_or_unusable_if_modified_since():
+    assert not is_not_modified(make_request(if_modified_since="not a date"), ETAG, LAST_MODIFIED)
+    assert not is_not_modified(make_request(if_modified_since="Fri, 02 Jan 2026 00:00:00 GMT"), ETAG, None)
+
+
+def test_etag_changes_with_version():
+    assert make_etag("card", "acme", "jo", 1) == ETAG
+    assert make_etag("card", "acme", "jo", 2) != ETAG
+
+
+def test_last_modified_of_picks_newest_and_truncates():
+    naive = datetime(2026, 1, 1, 12, 0, 0, 999999)
+    older = datetime(2025, 12, 31, tzinfo=timezone.utc)
+
+    assert last_modified_of(naive, None, older) == LAST_MODIFIED
+    assert last_modified_of(None) is None
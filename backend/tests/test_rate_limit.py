@@ -0,0 +1,106 @@
+import pytest
+from starlette.requests import Request
+
+import rate_limit
+from rate_limit import SlidingWindowLimiter, client_ip
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake)
+    return fake
+
+
+# ========== SlidingWindowLimiter ==========
+
+def test_limiter_allows_up_to_limit(clock):
+    limiter = SlidingWindowLimiter(limit=3, window=60)
+    for _ in range(3):
+        assert limiter.retry_after("ip") == 0
+        limiter.hit("ip")
+
+    assert limiter.retry_after("ip") == pytest.approx(60)
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_limiter_window_slides(clock):
+    limiter = SlidingWindowLimiter(limit=2, window=60)
+    limiter.hit("ip")
+    clock.now += 30
+    limiter.hit("ip")
+
+    assert limiter.retry_after("ip") == pytest.approx(30)
+    clock.now += 30
+    assert limiter.retry_after("ip") == 0
+
+
+def test_limiter_keys_are_independent_and_reset(clock):
+    limiter = SlidingWindowLimiter(limit=1, window=60)
+    limiter.hit("a")
+
+    assert limiter.retry_after("a") > 0
+    assert limiter.retry_after("b") == 0
+    limiter.reset("a")
+    assert limiter.retry_after("a") == 0
+
+
+def test_limiter_bounds_tracked_keys(clock):
+    limiter = SlidingWindowLimiter(limit=5, window=60, max_keys=2)
+    for key in ("a", "b", "c"):
+        limiter.hit(key)
+
+    assert limiter.stats()["tracked_keys"] == 2
+
+
+def test_limiter_drops_idle_keys(clock):
+    limiter = SlidingWindowLimiter(limit=5, window=60)
+    limiter.hit("a")
+    clock.now += 61
+    limiter.hit("b")
+
+    assert limiter.stats()["tracked_keys"] == 1
+
+
+# ========== client_ip ==========
+
+def make_request(peer: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "client": (peer, 12345), "headers": headers})
+
+
+def test_client_ip_without_forwarded_header():
+    assert client_ip(make_request("203.0.113.7")) == "203.0.113.7"
+
+
+def test_client_ip_ignores_forwarded_header_from_untrusted_peer():
+    assert client_ip(make_request("203.0.113.7", "198.51.100.1")) == "203.0.113.7"
+
+
+def test_client_ip_uses_rightmost_untrusted_hop_from_trusted_proxy():
+    assert client_ip(make_request("127.0.0.1", "198.51.100.1")) == "198.51.100.1"
+    # The left-most entry is caller-controlled; only our own proxies are skipped
+    assert client_ip(make_request("127.0.0.1", "10.9.9.9, 198.51.100.1, 127.0.0.1")) == "198.51.100.1"
+
+
+def test_client_ip_when_every_hop_is_trusted():
+    assert client_ip(make_request("::1", "127.0.0.1")) == "127.0.0.1"
+
+
+def test_spoofed_forwarded_for_through_trusted_proxy_is_still_limited(clock):
+    limiter = SlidingWindowLimiter(limit=3, window=60)
+    # The proxy appends the address it saw; the caller rotates everything before it
+    for attempt in range(3):
+        limiter.hit(client_ip(make_request("127.0.0.1", f"10.0.0.{attempt}, 198.51.100.7")))
+
+    spoofed = make_request("127.0.0.1", "10.0.0.99, 198.51.100.7")
+    assert client_ip(spoofed) == "198.51.100.7"
+    assert limiter.retry_after(client_ip(spoofed)) > 0
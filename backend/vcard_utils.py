@@ -1,5 +1,5 @@
 """vCard generation utility for RFC 3.0 compliant contact format."""
-from typing import Optional, Dict
+from typing import Any, Optional, Dict, NamedTuple
 
 
 def escape_vcard_value(value: str) -> str:
@@ -96,3 +96,42 @@ def generate_vcard(
     lines.append("END:VCARD")
     
     return "\n".join(lines)
+
+
+
+class RenderedVCard(NamedTuple):
+    """Pre-encoded .vcf body with its download headers."""
+    body: bytes
+    headers: Dict[str, str]
+
+
+def render_vcard_file(card: Dict[str, Any]) -> RenderedVCard:
+    """
+    Render a public card payload into a downloadable .vcf file.
+    
+    Args:
+        card: BusinessCardResponse fields (as stored in the card snapshot)
+    
+    Returns:
+        UTF-8 encoded vCard with Content-Length and Content-Disposition headers
+    """
+    body = generate_vcard(
+        full_name=card["employee_name"],
+        job_title=card.get("job_title"),
+        email=card.get("email"),
+        phone=card.get("phone"),
+        whatsapp=card.get("whatsapp"),
+        company_name=card.get("company_name"),
+        photo_url=card.get("photo_url"),
+        bio=card.get("bio"),
+        social_links=card.get("social_links"),
+    ).encode("utf-8")
+    
+    filename = f"{card['employee_name'].replace(' ', '_')}.vcf"
+    return RenderedVCard(
+        body=body,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(len(body)),
+        },
+    )
@@ -13,11 +13,20 @@ export async function POST(request: NextRequest) {
     const apiBase = getBackendUrl();
     const backendUrl = `${apiBase}/auth/login`;
     
+    const headers: HeadersInit = {
+      'Content-Type': 'application/json',
+    };
+
+    // Pass on the address this server saw so the backend throttles per user, not
+    // per frontend server. Never relay the caller's own X-Forwarded-For: the
+    // backend trusts this hop, so a spoofed value would mint a new "IP" per request.
+    if (request.ip) {
+      headers['X-Forwarded-For'] = request.ip;
+    }
+
     const response = await fetch(backendUrl, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers,
       body: JSON.stringify(body),
     });
 
@@ -30,7 +39,13 @@ export async function POST(request: NextRequest) {
     }
 
     const data = await response.json();
-    return NextResponse.json(data);
+    const result = NextResponse.json(data);
+    // Keeps this client's next reads on the primary database (read-your-writes)
+    const setCookie = response.headers.get('set-cookie');
+    if (setCookie) {
+      result.headers.set('Set-Cookie', setCookie);
+    }
+    return result;
   } catch (error) {
     console.error('Auth login API route error:', error);
     return NextResponse.json(
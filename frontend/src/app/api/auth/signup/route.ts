@@ -30,7 +30,13 @@ export async function POST(request: NextRequest) {
     }
 
     const data = await response.json();
-    return NextResponse.json(data);
+    const result = NextResponse.json(data);
+    // Keeps this client's next reads on the primary database (read-your-writes)
+    const setCookie = response.headers.get('set-cookie');
+    if (setCookie) {
+      result.headers.set('Set-Cookie', setCookie);
+    }
+    return result;
   } catch (error) {
     console.error('Auth signup API route error:', error);
     return NextResponse.json(
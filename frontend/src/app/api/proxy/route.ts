@@ -6,6 +6,23 @@ function getBackendUrl(): string {
   return `http://${apiHost}:${apiPort}`;
 }
 
+// The backend sets a short-lived cookie after writes so the client's next reads
+// go to the primary database; pass it through in both directions.
+function forwardCookie(request: NextRequest, headers: Record<string, string>) {
+  const cookie = request.headers.get('cookie');
+  if (cookie) {
+    headers['Cookie'] = cookie;
+  }
+}
+
+function withBackendCookies(backendResponse: Response, response: NextResponse): NextResponse {
+  const setCookie = backendResponse.headers.get('set-cookie');
+  if (setCookie) {
+    response.headers.set('Set-Cookie', setCookie);
+  }
+  return response;
+}
+
 export async function GET(request: NextRequest) {
   const { searchParams } = new URL(request.url);
   const path = searchParams.get('path');
@@ -22,13 +39,14 @@ export async function GET(request: NextRequest) {
     const apiBase = getBackendUrl();
     const backendUrl = `${apiBase}/api${path}`;
     
-    const headers: HeadersInit = {
+    const headers: Record<string, string> = {
       'Content-Type': 'application/json',
     };
 
     if (auth_header) {
       headers['Authorization'] = auth_header;
     }
+    forwardCookie(request, headers);
 
     const response = await fetch(backendUrl, {
       method: 'GET',
@@ -43,7 +61,7 @@ export async function GET(request: NextRequest) {
     }
 
     const data = await response.json();
-    return NextResponse.json(data);
+    return withBackendCookies(response, NextResponse.json(data));
   } catch (error) {
     console.error('Company GET API route error:', error);
     return NextResponse.json(
@@ -70,13 +88,14 @@ export async function POST(request: NextRequest) {
     const apiBase = getBackendUrl();
     const backendUrl = `${apiBase}/api${path}`;
     
-    const headers: HeadersInit = {
+    const headers: Record<string, string> = {
       'Content-Type': 'application/json',
     };
 
     if (auth_header) {
       headers['Authorization'] = auth_header;
     }
+    forwardCookie(request, headers);
 
     const response = await fetch(backendUrl, {
       method: 'POST',
@@ -93,7 +112,7 @@ export async function POST(request: NextRequest) {
     }
 
     const data = await response.json();
-    return NextResponse.json(data);
+    return withBackendCookies(response, NextResponse.json(data));
   } catch (error) {
     console.error('Company POST API route error:', error);
     return NextResponse.json(
@@ -120,13 +139,14 @@ export async function PUT(request: NextRequest) {
     const apiBase = getBackendUrl();
     const backendUrl = `${apiBase}/api${path}`;
     
-    const headers: HeadersInit = {
+    const headers: Record<string, string> = {
       'Content-Type': 'application/json',
     };
 
     if (auth_header) {
       headers['Authorization'] = auth_header;
     }
+    forwardCookie(request, headers);
 
     const response = await fetch(backendUrl, {
       method: 'PUT',
@@ -143,7 +163,7 @@ export async function PUT(request: NextRequest) {
     }
 
     const data = await response.json();
-    return NextResponse.json(data);
+    return withBackendCookies(response, NextResponse.json(data));
   } catch (error) {
     console.error('Company PUT API route error:', error);
     return NextResponse.json(
@@ -169,13 +189,14 @@ export async function DELETE(request: NextRequest) {
     const apiBase = getBackendUrl();
     const backendUrl = `${apiBase}/api${path}`;
     
-    const headers: HeadersInit = {
+    const headers: Record<string, string> = {
       'Content-Type': 'application/json',
     };
 
     if (auth_header) {
       headers['Authorization'] = auth_header;
     }
+    forwardCookie(request, headers);
 
     const response = await fetch(backendUrl, {
       method: 'DELETE',
@@ -190,7 +211,7 @@ export async function DELETE(request: NextRequest) {
     }
 
     const data = await response.json();
-    return NextResponse.json(data);
+    return withBackendCookies(response, NextResponse.json(data));
   } catch (error) {
     console.error('Company DELETE API route error:', error);
     return NextResponse.json(
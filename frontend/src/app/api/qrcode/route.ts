@@ -22,10 +22,8 @@ export async function GET(request: NextRequest) {
     const apiBase = getBackendUrl();
     const backendUrl = `${apiBase}/card/${company_slug}/${employee_slug}/qr-vcard`;
     
-    const response = await fetch(backendUrl, {
-      method: 'GET',
-      redirect: 'follow',
-    });
+    // The backend renders and caches the QR image itself, so no redirect to follow
+    const response = await fetch(backendUrl, { method: 'GET' });
 
     if (!response.ok) {
       console.error(`QR backend returned ${response.status}`);
@@ -39,12 +37,13 @@ export async function GET(request: NextRequest) {
     const arrayBuffer = await response.arrayBuffer();
     const buffer = Buffer.from(arrayBuffer);
     
-    // Return as PNG image
+    // Pass through the backend's content type and validators
     return new NextResponse(buffer, {
       status: 200,
       headers: {
-        'Content-Type': 'image/png',
-        'Cache-Control': 'public, max-age=3600',
+        'Content-Type': response.headers.get('Content-Type') || 'image/png',
+        'Cache-Control': response.headers.get('Cache-Control') || 'public, max-age=3600',
+        ...(response.headers.get('ETag') ? { ETag: response.headers.get('ETag') as string } : {}),
       },
     });
   } catch (error) {
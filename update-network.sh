@@ -55,5 +55,6 @@ echo ""
 echo "🌐 Access the application at:"
 echo "  http://$NEW_IP:3000"
 echo ""
-echo "💡 To regenerate test cards with new IP:"
-echo "  python3 seed_test_data.py"
+echo "💡 Card URLs are resolved against the new IP per request; no card regeneration needed."
+echo "   Cards created before relative URLs can be rewritten once with:"
+echo "  docker-compose exec backend python maintenance.py card-urls"